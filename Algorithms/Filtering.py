@@ -47,13 +47,7 @@ class Filtering(VariableConstraintGA):
 
     def place_in_bin(self, ind, infeasible_pop):
         # determine if feasible 
-        fes = True 
-        constraints_sat = 0 
-        for con in self.problem_space.get_constant_constraints():
-            if not con.apply(ind):
-                fes = False 
-            else:
-                constraints_sat += 1 
+        fes, constraints_sat = self.satisfaction.check_constant_constraints(ind)
                  
         
         # if feasible put in bin 
@@ -97,10 +91,7 @@ class Filtering(VariableConstraintGA):
             self.place_in_bin(indv, self.infeasible_pop)
     
     def satisfies_all_con(self, ind):
-        for con in self.problem_space.get_constant_constraints() + self.variable_constraints:
-            if not con.apply(ind):
-                return False 
-        return True 
+        return self.satisfaction.satisfies_all(ind)
     
     def clean_bins(self):
         bi = self.bins[:]
@@ -133,6 +124,7 @@ class Filtering(VariableConstraintGA):
             self.place_in_bin(child2, new_infeasible)
         
         self.infeasible_pop = new_infeasible 
+        self.satisfaction.retain([c[1] for c in self.infeasible_pop] + [el[1] for li in self.bins for el in li])
 
         return self.clean_bins(), None 
 
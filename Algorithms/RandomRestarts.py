@@ -47,13 +47,10 @@ class RandomRestarts(VariableConstraintGA):
 
     def place_in_bin(self, ind, infeasible_pop):
         # determine if feasible 
-        fes = True 
-        constraints_sat = 0 
-        for con in self.problem_space.get_constant_constraints() + self.variable_constraints:
-            if not con.apply(ind):
-                fes = False 
-            else:
-                constraints_sat += 1 
+        fes, constraints_sat = self.satisfaction.check_constant_constraints(ind)
+        if self.satisfaction.num_violated(ind) > 0:
+            fes = False 
+        constraints_sat += self.satisfaction.num_satisfied(ind)
                  
         
         # if feasible put in bin 
@@ -120,6 +117,7 @@ class RandomRestarts(VariableConstraintGA):
             self.place_in_bin(child2, new_infeasible)
         
         self.infeasible_pop = new_infeasible 
+        self.satisfaction.retain([c[1] for c in self.infeasible_pop] + [el[1] for li in self.bins for el in li])
 
         return self.bins, None 
 
@@ -68,13 +68,7 @@ class VariableConstraintMapElites(VariableConstraintGA):
 
     def place_in_bin(self, ind, infeasible_pop):
         # determine if feasible (from static constraints)
-        fes = True 
-        constraints_sat = 0 
-        for con in self.problem_space.get_constant_constraints():
-            if not con.apply(ind):
-                fes = False 
-            else:
-                constraints_sat += 1 
+        fes, constraints_sat = self.satisfaction.check_constant_constraints(ind)
                  
         
         # if feasible put in bin 
@@ -83,10 +77,7 @@ class VariableConstraintMapElites(VariableConstraintGA):
             if len(self.variable_constraints) == 0: 
                 l = 0 
             else:
-                constraints_vio = 0 
-                for con in self.variable_constraints:
-                    if not con.apply(ind):
-                        constraints_vio += 1 
+                constraints_vio = self.satisfaction.num_violated(ind)
                 
                 per_vio = constraints_vio / len(self.variable_constraints)
                 
@@ -139,10 +130,7 @@ class VariableConstraintMapElites(VariableConstraintGA):
             self.place_in_bin(indv, self.infeasible_pop)
     
     def satisfies_all_con(self, ind):
-        for con in self.problem_space.get_constant_constraints() + self.variable_constraints:
-            if not con.apply(ind):
-                return False 
-        return True 
+        return self.satisfaction.satisfies_all(ind)
     
     def clean_bins(self):
         bi = self.bins[:]
@@ -195,6 +183,7 @@ class VariableConstraintMapElites(VariableConstraintGA):
             self.place_in_bin(child2, new_infeasible)
         
         self.infeasible_pop = new_infeasible 
+        self.satisfaction.retain([c[1] for c in self.infeasible_pop] + [el[1] for row in self.bins for li in row for el in li])
 
         return self.bins[0], None 
 
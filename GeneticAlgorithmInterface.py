@@ -73,6 +73,102 @@ class User:
     def update_constraints(self, cur_constraints, feasible, recommendation = None):
         return [], False, False 
 
+class SatisfactionMatrix:
+    """
+    Which variable constraints each archived individual
+    satisfies, kept as one bitmask row per individual with
+    one bit (column) per active constraint
+
+    Rows are added the first time an individual is looked up
+    and dropped with retain. Columns follow set_constraints:
+    only a new constraint is applied, to every row, and a
+    removed one just frees its bit. The constant constraints
+    never change, so each row also keeps their result
+
+    Rows and columns are keyed by id() and hold their individual
+    or constraint, so an id is not reused while its key is in use.
+    A constraint that is equal to a removed one but another object
+    gets a column of its own
+    """
+    def __init__(self, problem_space: ProblemSpace):
+        self.problem_space = problem_space
+        self.columns = {}
+        self.free_bits = []
+        self.num_bits = 0
+        self.full_mask = 0
+        self.rows = {}
+
+    def set_constraints(self, constraints):
+        """
+        Make the columns match a list of constraints
+        """
+        active = {id(con): con for con in constraints}
+        for key in list(self.columns):
+            if key not in active:
+                con, bit = self.columns.pop(key)
+                self.full_mask &= ~(1 << bit)
+                self.free_bits.append(bit)
+                for row in self.rows.values():
+                    row[1] &= ~(1 << bit)
+
+        for key, con in active.items():
+            if key in self.columns:
+                continue
+            if self.free_bits:
+                bit = self.free_bits.pop()
+            else:
+                bit = self.num_bits
+                self.num_bits += 1
+            self.columns[key] = (con, bit)
+            self.full_mask |= 1 << bit
+            for row in self.rows.values():
+                if con.apply(row[0]):
+                    row[1] |= 1 << bit
+
+    def row(self, ind):
+        """
+        Return [ind, variable mask, (feasible, constraints_sat)],
+        filling it in the first time ind is seen
+        """
+        row = self.rows.get(id(ind))
+        if row is None or row[0] is not ind:
+            mask = 0
+            for con, bit in self.columns.values():
+                if con.apply(ind):
+                    mask |= 1 << bit
+            row = [ind, mask, self.problem_space.check_constant_constraints(ind)]
+            self.rows[id(ind)] = row
+        return row
+
+    def check_constant_constraints(self, ind):
+        return self.row(ind)[2]
+
+    def num_satisfied(self, ind):
+        """
+        Return how many variable constraints ind satisfies
+        """
+        return bin(self.row(ind)[1]).count("1")
+
+    def num_violated(self, ind):
+        return len(self.columns) - self.num_satisfied(ind)
+
+    def satisfies_all(self, ind):
+        """
+        Return whether ind satisfies every
+        constant and variable constraint
+        """
+        row = self.row(ind)
+        return row[2][0] and row[1] == self.full_mask
+
+    def retain(self, individuals):
+        """
+        Drop the rows of individuals not in the list
+        """
+        keep = {id(ind) for ind in individuals}
+        for key in [key for key in self.rows if key not in keep]:
+            del self.rows[key]
+
+
 class VariableConstraintGA:
     """
     Interface for a variable constraint 
@@ -98,6 +194,8 @@ class VariableConstraintGA:
         """
         self.variable_constraints = self.problem_space.get_initial_variable_constraints()
         self.measure_history = Measures()
+        self.satisfaction = SatisfactionMatrix(self.problem_space)
+        self.satisfaction.set_constraints(self.variable_constraints)
 
     def set_up(self):
         """
@@ -129,6 +227,16 @@ class VariableConstraintGA:
         """
         return [] * self.problem_space.get_num_bins() , None 
     
+    def solver_profile(self):
+        """
+        Report of where the problem space spent its 
+        time evaluating individuals, None if it was 
+        not asked to profile 
+
+        Should NOT be over-written 
+        """
+        return self.problem_space.solver_profile()
+
     def run(self):
         """
         Run the full evolution cycle 
@@ -161,5 +269,6 @@ class VariableConstraintGA:
             self.made_change = made_change
             self.followed_rec = followed_rec 
             self.variable_constraints = variable_constraints
+            self.satisfaction.set_constraints(self.variable_constraints)
         
         return population
\ No newline at end of file
@@ -17,7 +17,8 @@ class StrictUser(User):
 
         new_con = self.problem_space.get_rand_constraint() 
         i = 0 
-        while not self.problem_space.is_contradictory( cur_constraints + [new_con]) and i < 1000:
+        # screen_constraints reuses the work on cur_constraints
+        while not self.problem_space.screen_constraints(cur_constraints, [new_con])[0] and i < 1000:
             new_con = self.problem_space.get_rand_constraint()
             i += 1 
         if not i == 1000:
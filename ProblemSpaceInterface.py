@@ -79,6 +79,22 @@ class ProblemSpace:
         """
         return [] 
     
+    def check_constant_constraints(self, ind):
+        """
+        Return (feasible, constraints_sat) where feasible is 
+        true if ind obeys every constant constraint and 
+        constraints_sat is how many it obeys 
+
+        Over-write this if the constraints can be 
+        checked together faster 
+        """
+        constraints = self.get_constant_constraints()
+        constraints_sat = 0 
+        for con in constraints:
+            if con.apply(ind):
+                constraints_sat += 1 
+        return constraints_sat == len(constraints), constraints_sat 
+
     def get_initial_variable_constraints(self):
         """
         Return a list of initial variable constraints 
@@ -97,6 +113,16 @@ class ProblemSpace:
         all listed constraints 
         """
         return False  
+
+    def screen_constraints(self, constraints, candidates):
+        """
+        Return is_contradictory(constraints + [candidate])
+        for every candidate, in order 
+
+        Can be over-written to share the work on 
+        constraints between the candidates 
+        """
+        return [self.is_contradictory(constraints + [con]) for con in candidates]
     
     def get_rand_constraint(self):
         """
@@ -111,6 +137,14 @@ class ProblemSpace:
         constraint that is is obeys 
         """
         return Constraint()
+
+    def solver_profile(self):
+        """
+        Return a report of where evaluating 
+        individuals spends its time, or None 
+        if the problem space does not profile 
+        """
+        return None 
     
 
     
\ No newline at end of file
@@ -0,0 +1,116 @@
+"""
+Hints from the grammar are nested dictionaries such as
+{"is": [Category, "Potatoes", Category, "whole"]}. The solver
+works on a compiled form instead: a flat tuple of ints that
+starts with an opcode, with categories as their index in
+puzzle.categories and entities as their index in the category.
+
+is:          (IS, cat1, ent1, cat2, ent2)
+not:         (NOT, cat1, ent1, cat2, ent2)
+before:      (BEFORE, bef_cat, bef_ent, aft_cat, aft_ent, num_cat, num)
+             where num is None when the hint has no spot count
+simple_or:   (SIMPLE_OR, cat1, ent1, cat2, ent2, ans_cat, ans_ent)
+compound_or: (COMPOUND_OR, (cat1, ent1, cat2, ent2), (cat1, ent1, cat2, ent2))
+"""
+
+IS = 0
+NOT = 1
+BEFORE = 2
+SIMPLE_OR = 3
+COMPOUND_OR = 4
+UNKNOWN = 5
+
+RULES = {
+    "is": IS,
+    "not": NOT,
+    "before": BEFORE,
+    "simple_or": SIMPLE_OR,
+    "compound_or": COMPOUND_OR,
+}
+
+
+def is_compiled(hint):
+    return isinstance(hint, tuple)
+
+
+def _term(lookup, cat, ent):
+    return lookup.category_index[cat], lookup.entity_index[cat][ent]
+
+
+def _is_terms(lookup, terms):
+    return _term(lookup, terms[0], terms[1]) + _term(lookup, terms[2], terms[3])
+
+
+def compile_hint(puzzle, hint):
+    """
+    return the compiled tuple for a grammar hint,
+    compiled hints are returned as they are
+    """
+    if is_compiled(hint):
+        return hint
+
+    lookup = puzzle.lookup
+    rule = list(hint.keys())[0]
+    terms = hint[rule]
+    op = RULES.get(rule, UNKNOWN)
+
+    if op == IS:
+        return (IS,) + _is_terms(lookup, terms)
+    elif op == NOT:
+        return (NOT,) + _is_terms(lookup, terms[0]["is"])
+    elif op == BEFORE:
+        num = terms[5] if len(terms) == 6 else None
+        return (BEFORE,) + _is_terms(lookup, terms) + (
+            lookup.category_index[terms[4]],
+            num,
+        )
+    elif op == SIMPLE_OR:
+        return (SIMPLE_OR,) + _is_terms(lookup, terms) + _term(
+            lookup, terms[4], terms[5]
+        )
+    elif op == COMPOUND_OR:
+        return (
+            COMPOUND_OR,
+            _is_terms(lookup, terms[0]["is"]),
+            _is_terms(lookup, terms[1]["is"]),
+        )
+    return (UNKNOWN,)
+
+
+def compile_hints(puzzle, hints):
+    return [compile_hint(puzzle, hint) for hint in hints]
+
+
+def _uncompile_is(puzzle, terms):
+    cat1 = puzzle.categories[terms[0]]
+    cat2 = puzzle.categories[terms[2]]
+    return [cat1, cat1.entities[terms[1]], cat2, cat2.entities[terms[3]]]
+
+
+def uncompile_hint(puzzle, compiled):
+    """
+    return the grammar hint for a compiled tuple
+    """
+    op = compiled[0]
+    if op == IS:
+        return {"is": _uncompile_is(puzzle, compiled[1:5])}
+    elif op == NOT:
+        return {"not": [{"is": _uncompile_is(puzzle, compiled[1:5])}]}
+    elif op == BEFORE:
+        terms = _uncompile_is(puzzle, compiled[1:5]) + [puzzle.categories[compiled[5]]]
+        if compiled[6] is not None:
+            terms.append(compiled[6])
+        return {"before": terms}
+    elif op == SIMPLE_OR:
+        ans_cat = puzzle.categories[compiled[5]]
+        return {
+            "simple_or": _uncompile_is(puzzle, compiled[1:5])
+            + [ans_cat, ans_cat.entities[compiled[6]]]
+        }
+    elif op == COMPOUND_OR:
+        return {
+            "compound_or": [
+                {"is": _uncompile_is(puzzle, compiled[1])},
+                {"is": _uncompile_is(puzzle, compiled[2])},
+            ]
+        }
@@ -3,6 +3,9 @@ sys.path.insert(0, "../")  # add Folder_2 path to search list
 
 from ProblemSpaceInterface import ProblemSpace, Constraint
 from HintGrammar import generate_hint
+from HintCompatibility import get_compatibility
+from LogicPuzzle import apply_hints
+from CompiledHints import compile_hint, compile_hints
 import random 
 
 
@@ -11,11 +14,13 @@ import random
 class GridIsValid(Constraint):
     def __init__(self, grid_key):
         self.grid_key = grid_key 
+        # bit of the grid in HintSet.constant_checks masks
+        self.bit = None
     
     def apply(self, indv):
-        puzz = indv.completed_puzzle 
-        grid = puzz.get_grid_by_key(self.grid_key)
-        return puzz.grid_is_valid(grid)
+        if self.bit is None:
+            self.bit = indv.puzzle.get_grid_keys().index(self.grid_key)
+        return bool(indv.constant_checks()[0] >> self.bit & 1)
 
     def __str__(self):
         return "grid: {} is valid".format(self.grid_key)
@@ -23,11 +28,13 @@ class GridIsValid(Constraint):
 class GridIsComplete(Constraint):
     def __init__(self, grid_key):
         self.grid_key = grid_key 
+        # bit of the grid in HintSet.constant_checks masks
+        self.bit = None
     
     def apply(self, indv):
-        puzz = indv.completed_puzzle 
-        grid = puzz.get_grid_by_key(self.grid_key)
-        return puzz.grid_is_complete(grid)
+        if self.bit is None:
+            self.bit = indv.puzzle.get_grid_keys().index(self.grid_key)
+        return bool(indv.constant_checks()[1] >> self.bit & 1)
     
     def __str__(self):
         return "grid: {} is complete".format(self.grid_key)
@@ -35,8 +42,7 @@ class GridIsComplete(Constraint):
 class NoViolations(Constraint):
 
     def apply(self, indv):
-        puzz = indv.completed_puzzle 
-        return puzz.num_violations() == 0 
+        return indv.constant_checks()[2] == 0 
 
     def __str__(self):
         return "No violations in puzzle" 
@@ -51,6 +57,23 @@ def get_constant_constraints(puzz):
     return valid_constraints + complete_constraints + [violations]
 
 
+def check_constant_constraints(indv):
+    """
+    apply every constraint from get_constant_constraints
+    from the individual's constant_checks, one pass over
+    the completed puzzle made once per individual
+
+    return: feasible, constraints_sat
+     feasible        = whether every constraint holds
+     constraints_sat = how many of them hold
+    """
+    valid, complete, violations = indv.constant_checks()
+    constraints_sat = bin(valid).count("1") + bin(complete).count("1")
+    if violations == 0:
+        constraints_sat += 1
+    return constraints_sat == 2 * len(indv.puzzle.grids) + 1, constraints_sat
+
+
 def get_duplicates(hint):
         try:
             rule = list(hint.keys())[0]
@@ -109,28 +132,21 @@ class HasHint(Constraint):
     def __init__(self, hint):
 
         self.hint = hint 
-        self.duplicates = [hint] + get_duplicates(hint)
-
-    def _has_hint(self, ind, hint):
-        hint = str_hint(hint)
-        all_hints = [str_hint(h) for h in ind.hints]
-
-        return hint in all_hints
-    
+        # key in the individuals' HintUniverse, see HintSet.hint_keys
+        self.key = None
     
     def apply(self, indv):
-        has_hint = False 
-        for hint in self.duplicates:
-            if not has_hint: 
-                has_hint = self._has_hint(indv, hint)
-        
-        return has_hint 
+        if self.key is None:
+            self.key = indv.universe.hint_key(self.hint)
+        return self.key in indv.hint_keys
 
     def __str__(self):
         return "Has Hint: " + str_hint(self.hint)
 
-def random_constraint(puzzle):
-    return HasHint(generate_hint(puzzle))
+def random_constraint(puzzle, hint_pool=None):
+    if hint_pool is None:
+        return HasHint(generate_hint(puzzle))
+    return HasHint(hint_pool.draw())
 
 def constraint_in_ind(ind):
     hint = random.choice(ind.hints)
@@ -140,5 +156,68 @@ def constraint_in_ind(ind):
 
 def is_contradictory(puzzle, constraints): 
     hintList = [con.hint for con in constraints if isinstance(con, HasHint)]
+    # two hints that contradict outright need no solve
+    if not get_compatibility(puzzle).compatible(hintList):
+        return False
     completed_puzzle, valid, loops,solver_insights = puzzle.apply_hints(hintList)
-    return valid 
\ No newline at end of file
+    return valid 
+
+
+class ContradictionChecker:
+    """
+    is_contradictory for one list of constraints with each of
+    many candidates added in turn, solving the list only once
+
+    The hints of the list are solved once and the solver state
+    after each of them kept (see apply_hints checkpoints). Each
+    candidate is solved from the state after the whole list, so
+    only the candidate and the passes after the first run again,
+    with the same result as solving everything from scratch
+    """
+
+    def __init__(self, puzzle, constraints):
+        self.puzzle = puzzle
+        self.compatibility = get_compatibility(puzzle)
+        self.hints = compile_hints(
+            puzzle, [con.hint for con in constraints if isinstance(con, HasHint)]
+        )
+        self.checkpoints = []
+        self.valid = False
+        self.first_pass_failed = False
+        if len(self.hints) > 0:
+            _, self.valid, _, _ = apply_hints(
+                puzzle, self.hints, checkpoints=self.checkpoints
+            )
+            # the first pass stopped part way, as it would
+            # with any hint added after the list
+            self.first_pass_failed = len(self.checkpoints) <= len(self.hints)
+        self.results = {}
+
+    def is_contradictory(self, constraint):
+        """
+        return is_contradictory(puzzle, constraints + [constraint])
+        """
+        if not isinstance(constraint, HasHint):
+            return self.valid
+        hint = compile_hint(self.puzzle, constraint.hint)
+        valid = self.results.get(hint)
+        if valid is None:
+            valid = self._solve(hint)
+            self.results[hint] = valid
+        return valid
+
+    def _solve(self, hint):
+        if self.first_pass_failed:
+            return False
+        if not self.compatibility.compatible_with(self.hints, hint):
+            return False
+        _, valid, _, _ = apply_hints(
+            self.puzzle, self.hints + [hint], checkpoints=self.checkpoints[:]
+        )
+        return valid
+
+    def screen(self, candidates):
+        """
+        return is_contradictory for every candidate constraint
+        """
+        return [self.is_contradictory(con) for con in candidates]
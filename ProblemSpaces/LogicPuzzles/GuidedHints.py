@@ -0,0 +1,131 @@
+"""
+Hints that are true in a hidden target solution
+
+A solution is an int array rows[cat, ent], the row of the
+solution each entity is in: entities in the same row are the
+same, and the entity of a numeric category in a row gives the
+row's position. Category 0 is the row numbering, every other
+category is a random permutation of the rows.
+
+The truth of a batch of compiled hints (see CompiledHints) is
+found with array lookups, one column per field, so a pool can
+sample hints from the grammar and keep the true ones:
+
+is:          the terms are in the same row
+not:         the terms are in different rows
+before:      the position of bef_term is less than aft_term's,
+             or exactly num less when there is a spot count
+simple_or:   exactly one of the two terms is in ans_term's row
+compound_or: exactly one of the two "is" parts holds
+"""
+
+import random
+
+import numpy as np
+
+from CompiledHints import IS, NOT, BEFORE, SIMPLE_OR, COMPOUND_OR, compile_hint
+from HintGrammar import HintPool
+
+
+def random_solution(puzzle, rng):
+    """
+    return rows[cat, ent] for a random solution of the
+    puzzle, whose categories all have as many entities
+    """
+    sizes = set(len(cat.entities) for cat in puzzle.categories)
+    if len(sizes) != 1:
+        raise ValueError("categories of a solution need as many entities")
+    size = sizes.pop()
+    rows = [np.arange(size)]
+    for cat in puzzle.categories[1:]:
+        rows.append(rng.permutation(size))
+    return np.array(rows, dtype=np.int64)
+
+
+def hints_hold(rows, compiled_hints):
+    """
+    return a bool array, whether each compiled hint
+    is true in the solution rows
+    """
+    n = len(compiled_hints)
+    # op, term1, term2, two extra fields, the second compound_or part
+    fields = np.zeros((n, 11), dtype=np.int64)
+    for i, hint in enumerate(compiled_hints):
+        if hint[0] == COMPOUND_OR:
+            fields[i, 0] = COMPOUND_OR
+            fields[i, 1:5] = hint[1]
+            fields[i, 7:11] = hint[2]
+        else:
+            fields[i, : len(hint)] = [0 if f is None else f for f in hint]
+
+    op = fields[:, 0]
+    row1 = rows[fields[:, 1], fields[:, 2]]
+    row2 = rows[fields[:, 3], fields[:, 4]]
+    same = row1 == row2
+
+    # the entity of a category in each row, for positions
+    entities = np.argsort(rows, axis=1)
+    position1 = entities[fields[:, 5], row1]
+    position2 = entities[fields[:, 5], row2]
+    num = fields[:, 6]
+    before = np.where(
+        num == 0, position1 < position2, position2 - position1 == num
+    )
+
+    answer = rows[fields[:, 5], fields[:, 6]]
+    simple_or = (row1 == answer) != (row2 == answer)
+
+    compound_or = same != (
+        rows[fields[:, 7], fields[:, 8]] == rows[fields[:, 9], fields[:, 10]]
+    )
+
+    return np.select(
+        [op == IS, op == NOT, op == BEFORE, op == SIMPLE_OR, op == COMPOUND_OR],
+        [same, ~same, before, simple_or, compound_or],
+        False,
+    )
+
+
+class GuidedHintPool(HintPool):
+    """
+    HintPool that only hands out hints true in a hidden
+    target solution, drawn once when the pool is made
+
+    Each refill samples the grammar in batches and keeps the
+    hints hints_hold finds true, so draws are the grammar's
+    distribution restricted to true hints. Any list of them is
+    satisfied by the target, so the solver never finds one
+    contradictory
+    """
+
+    def __init__(self, puzzle, size=1024, seed=None):
+        if seed is None:
+            seed = random.getrandbits(64)
+        super().__init__(puzzle, size, seed)
+        self.puzzle = puzzle
+        self.target = random_solution(puzzle, self.rng)
+        self.sampled = 0
+        self.accepted = 0
+
+    def refill(self):
+        hints = []
+        while len(hints) < self.size:
+            batch = self.sampler.sample_many(self.rng, self.size)
+            compiled = [compile_hint(self.puzzle, hint) for hint in batch]
+            keep = hints_hold(self.target, compiled)
+            hints += [hint for hint, true in zip(batch, keep) if true]
+            self.sampled += len(batch)
+            self.accepted += int(keep.sum())
+        self.hints = hints[: self.size]
+        self.position = 0
+
+    def stats(self):
+        """
+        return how many hints were sampled and
+        the share of them true in the target
+        """
+        return {
+            "sampled": self.sampled,
+            "accepted": self.accepted,
+            "accept_rate": self.accepted / self.sampled if self.sampled else 0.0,
+        }
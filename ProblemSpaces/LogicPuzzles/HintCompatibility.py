@@ -0,0 +1,148 @@
+"""
+Which pairs of hints of a puzzle contradict each other
+
+Every hint is solved once on its own, and what it forces is
+kept as two bitmasks over the cells in Puzzle.pack order, the
+cells it crosses out and the cells it marks. Two hints are
+incompatible when one marks a cell the other crosses out, when
+together they mark two cells of the same row or column, or when
+either is contradictory on its own. Both hints force their cells
+in any puzzle that holds them, so every hint list holding an
+incompatible pair is contradictory, and testing a pair is a few
+bit operations instead of a solve.
+
+Not every contradictory pair is found this way, so hint lists
+with no incompatible pair still need the solver.
+"""
+
+from HintUniverse import get_universe
+from LogicPuzzle import apply_hints
+
+
+class HintCompatibility:
+    def __init__(self, puzzle):
+        self.universe = get_universe(puzzle)
+        # a puzzle without caches to solve single hints in
+        self.solver = puzzle.blank()
+        self.lines = []
+        offset = 0
+        for grid in self.solver.grids.values():
+            rows, columns = len(grid), len(grid[0])
+            row_mask = (1 << columns) - 1
+            column_mask = sum(1 << (r * columns) for r in range(rows))
+            for r in range(rows):
+                self.lines.append(row_mask << (offset + r * columns))
+            for c in range(columns):
+                self.lines.append(column_mask << (offset + c))
+            offset += rows * columns
+
+        self.forced = {}
+        self.pairs = {}
+        self.checks = 0
+        self.rejections = 0
+
+    def forced_cells(self, hint_id):
+        """
+        return (crossed, marked) masks of the cells a hint
+        forces on its own, None if it is contradictory
+        """
+        forced = self.forced.get(hint_id, False)
+        if forced is not False:
+            return forced
+        puzzle, valid, _, _ = apply_hints(
+            self.solver, [self.universe.compiled(hint_id)]
+        )
+        forced = None
+        if valid:
+            packed = puzzle.pack()
+            crossed = marked = 0
+            for i in range(puzzle.num_cells()):
+                code = (packed[i >> 2] >> ((i & 3) << 1)) & 3
+                if code == 1:
+                    crossed |= 1 << i
+                elif code == 2:
+                    marked |= 1 << i
+            forced = (crossed, marked)
+        self.forced[hint_id] = forced
+        return forced
+
+    def compatible_pair(self, id1, id2):
+        """
+        return False if the two hints contradict
+        """
+        key = (id1, id2) if id1 <= id2 else (id2, id1)
+        compatible = self.pairs.get(key)
+        if compatible is not None:
+            return compatible
+
+        forced1 = self.forced_cells(id1)
+        forced2 = self.forced_cells(id2)
+        if forced1 is None or forced2 is None:
+            compatible = False
+        elif forced1[0] & forced2[1] or forced1[1] & forced2[0]:
+            compatible = False
+        else:
+            compatible = True
+            marked = forced1[1] | forced2[1]
+            if forced1[1] and forced2[1]:
+                for line in self.lines:
+                    in_line = marked & line
+                    if in_line & (in_line - 1):
+                        compatible = False
+                        break
+        self.pairs[key] = compatible
+        return compatible
+
+    def compatible(self, hints):
+        """
+        return False if any two of the grammar or compiled
+        hints contradict, True means the solver has to decide
+        """
+        self.checks += 1
+        ids = [self.universe.encode(hint) for hint in hints]
+        for i, id1 in enumerate(ids):
+            for id2 in ids[i:]:
+                if not self.compatible_pair(id1, id2):
+                    self.rejections += 1
+                    return False
+        return True
+
+    def compatible_with(self, hints, hint):
+        """
+        return False if hint contradicts itself or
+        any of the grammar or compiled hints
+        """
+        self.checks += 1
+        new_id = self.universe.encode(hint)
+        for hint_id in [self.universe.encode(h) for h in hints] + [new_id]:
+            if not self.compatible_pair(hint_id, new_id):
+                self.rejections += 1
+                return False
+        return True
+
+    def stats(self):
+        """
+        return how many hint lists were checked and rejected,
+        with the number of hints and pairs known
+        """
+        return {
+            "checks": self.checks,
+            "rejections": self.rejections,
+            "hints": len(self.forced),
+            "pairs": len(self.pairs),
+        }
+
+
+_compatibilities = {}
+
+def get_compatibility(puzzle):
+    """
+    return the HintCompatibility for
+    the categories of a puzzle
+    """
+    key = tuple(puzzle.categories)
+    compatibility = _compatibilities.get(key)
+    if compatibility is None:
+        compatibility = HintCompatibility(puzzle)
+        _compatibilities[key] = compatibility
+    return compatibility
@@ -1,6 +1,11 @@
 import random 
-from itertools import combinations  
+from itertools import combinations, product
 import math 
+import numpy as np
+
+from HintUniverse import get_universe
+from Insights import insight_mask, insights_of
+
 ###### HELPER FUNCTIONS #########
 
 terminals = [
@@ -193,80 +198,486 @@ def fill_in_word(puzzle, word):
     return filled_word
 
 
+CATEGORY_TERMS = {"cat", "cat1", "cat2", "cat3", "alp", "num"}
+# fewest entities the category before each term needs
+ENTITY_TERMS = {"ent": 1, "ent1": 1, "ent2": 2, "ent3": 3, "int": 3}
+
+
+class Production:
+    """
+    One production of the grammar compiled for a puzzle
+
+    fill_in_word draws a category for every category term and
+    throws away the hint when a category can't fill the terms
+    after it. Here every assignment of categories that works is
+    listed up front, each as likely as under fill_in_word.
+
+    accept: the chance fill_in_word keeps a hint of this production
+    """
+
+    def __init__(self, puzzle, words):
+        self.words = words
+        self.assignments = []
+        self.subs = {}
+        self.accept = 0
+
+        cats = puzzle.categories
+        domains = []  # one per category term
+        shuffled = []  # the position in create_cats' shuffle, or None
+        needs = []  # fewest entities each category term needs
+        for word in words:
+            if word in CATEGORY_TERMS:
+                if word == "alp":
+                    domains.append([cat for cat in cats if not cat.is_numeric])
+                elif word == "num":
+                    domains.append([cat for cat in cats if cat.is_numeric])
+                else:
+                    domains.append(cats)
+                shuffled.append(int(word[3:]) - 1 if word[3:] else None)
+                needs.append(0)
+            elif word in ENTITY_TERMS:
+                if not needs:
+                    return
+                needs[-1] = max(needs[-1], ENTITY_TERMS[word])
+            elif word not in terminals:
+                self.subs[word] = Choice(puzzle, sub_grammar(hint_grammar, word))
+
+        positions = sorted({p for p in shuffled if p is not None})
+        if positions and positions[-1] >= len(cats):
+            return
+        total = 1
+        for domain, position in zip(domains, shuffled):
+            if position is None:
+                total *= len(domain)
+        for i in range(len(positions)):
+            total *= len(cats) - i
+        if total <= 0:
+            return
+
+        for assignment in product(*domains):
+            picked = {}
+            works = True
+            for cat, position, need in zip(assignment, shuffled, needs):
+                if len(cat.entities) < need:
+                    works = False
+                if position is not None and picked.setdefault(position, cat) is not cat:
+                    works = False
+            if works and len(set(map(id, picked.values()))) == len(picked):
+                self.assignments.append(assignment)
+
+        self.accept = len(self.assignments) / total
+        for sub in self.subs.values():
+            self.accept *= sub.accept
+
+    def sample(self):
+        """
+        return the filled in terms
+        """
+        assignment = random.choice(self.assignments)
+        uniforms = [random.random() for _ in self.words]
+        subs = {
+            j: self.subs[word].sample()
+            for j, word in enumerate(self.words)
+            if word in self.subs
+        }
+        return self._fill(assignment, uniforms, subs)
+
+    def sample_many(self, rng, n):
+        """
+        return n filled in terms, drawing the
+        randomness in bulk from a numpy Generator
+        """
+        assignments = rng.integers(len(self.assignments), size=n).tolist()
+        uniforms = rng.random((n, len(self.words))).tolist()
+        subs = {
+            j: self.subs[word].sample_many(rng, n)
+            for j, word in enumerate(self.words)
+            if word in self.subs
+        }
+        return [
+            self._fill(
+                self.assignments[assignments[i]],
+                uniforms[i],
+                {j: samples[i] for j, samples in subs.items()},
+            )
+            for i in range(n)
+        ]
+
+    def _fill(self, assignment, uniforms, subs):
+        """
+        fill in the words with one uniform [0, 1) draw per word
+
+        assignment: the category for each category term
+        subs: the sampled terms for each non-terminal, by position
+        """
+        terms = []
+        picked = {}
+        last_cat = None
+        slot = 0
+        for j, word in enumerate(self.words):
+            u = uniforms[j]
+            if word in CATEGORY_TERMS:
+                last_cat = assignment[slot]
+                slot += 1
+                terms.append(last_cat)
+            elif word == "ent":
+                terms.append(last_cat.entities[int(u * len(last_cat.entities))])
+            elif word == "int":
+                # randrange(1, len - 1)
+                terms.append(1 + int(u * (len(last_cat.entities) - 2)))
+            elif word in ENTITY_TERMS:
+                # ent1, ent2 ... are places in a shuffle of the category,
+                # so they are distinct
+                places = picked.setdefault(last_cat, {})
+                if word not in places:
+                    taken = places.values()
+                    left = [ent for ent in last_cat.entities if ent not in taken]
+                    places[word] = left[int(u * len(left))]
+                terms.append(places[word])
+            elif j in subs:
+                terms.append({word: subs[j]})
+        return terms
+
+
+class Choice:
+    """
+    Alternatives picked uniformly by generate_word, compiled
+    for a puzzle. Alternatives are named rules for a dictionary
+    grammar and productions for a list of alternates.
+
+    Only alternatives the puzzle can fill are kept, weighted by
+    how often fill_in_word keeps them, so sampling gives the hints
+    generate_word and fill_in_word give after retries, without any
+    retries
+    """
+
+    def __init__(self, puzzle, grammar):
+        if isinstance(grammar, dict):
+            options = [
+                (rule, Choice(puzzle, alternates))
+                for rule, alternates in grammar.items()
+            ]
+        else:
+            options = [(None, Production(puzzle, words)) for words in grammar]
+
+        self.options = [option for option in options if option[1].accept > 0]
+        self.weights = []
+        total = 0
+        for _, option in self.options:
+            total += option.accept
+            self.weights.append(total)
+        self.accept = total / len(options) if options else 0
+
+    def sample(self):
+        if not self.options:
+            raise Exception("NO_HINTS")
+        rule, option = random.choices(self.options, cum_weights=self.weights)[0]
+        if rule is None:
+            return option.sample()
+        return {rule: option.sample()}
+
+    def sample_many(self, rng, n):
+        """
+        return n samples, drawing the randomness
+        in bulk from a numpy Generator
+        """
+        if not self.options:
+            raise Exception("NO_HINTS")
+        total = self.weights[-1]
+        picks = rng.choice(
+            len(self.options),
+            size=n,
+            p=[option.accept / total for _, option in self.options],
+        )
+        samples = [None] * n
+        for k, (rule, option) in enumerate(self.options):
+            rows = np.flatnonzero(picks == k).tolist()
+            if not rows:
+                continue
+            for i, sample in zip(rows, option.sample_many(rng, len(rows))):
+                samples[i] = sample if rule is None else {rule: sample}
+        return samples
+
+
+_samplers = {}
+
+def get_sampler(puzzle):
+    """
+    return the compiled hint grammar for
+    the categories of a puzzle
+    """
+    key = tuple(puzzle.categories)
+    sampler = _samplers.get(key)
+    if sampler is None:
+        sampler = Choice(puzzle, hint_grammar["hint"])
+        _samplers[key] = sampler
+    return sampler
+
+
 def generate_hint(puzzle):
     """
     given a puzzle generate a random, valid hint
     """
-    word = generate_word(hint_grammar, terminals)
-    try:
-        return fill_in_word(puzzle, word)["hint"]
-    except:
-        return generate_hint(puzzle)
-    
+    return get_sampler(puzzle).sample()
+
+
+class HintPool:
+    """
+    Ring buffer of hints for a puzzle, filled size hints
+    at a time from the compiled grammar with a numpy Generator
+
+    Draws are the same distribution as generate_hint
+    """
+
+    def __init__(self, puzzle, size=1024, seed=None):
+        if seed is None:
+            # follow random.seed so runs stay repeatable
+            seed = random.getrandbits(64)
+        self.sampler = get_sampler(puzzle)
+        self.rng = np.random.default_rng(seed)
+        self.size = size
+        self.hints = []
+        self.position = 0
+
+    def refill(self):
+        self.hints = self.sampler.sample_many(self.rng, self.size)
+        self.position = 0
+
+    def draw(self):
+        """
+        return the next hint, refilling
+        the buffer when it runs out
+        """
+        if self.position == len(self.hints):
+            self.refill()
+        hint = self.hints[self.position]
+        self.hints[self.position] = None
+        self.position += 1
+        return hint
+
+
+_pools = {}
+
+def get_pool(puzzle):
+    """
+    return the shared HintPool for
+    the categories of a puzzle
+    """
+    key = tuple(puzzle.categories)
+    pool = _pools.get(key)
+    if pool is None:
+        pool = HintPool(puzzle)
+        _pools[key] = pool
+    return pool
+
+
+def draw_hint(puzzle):
+    """
+    generate_hint from the puzzle's HintPool, the
+    one given to puzzle.use_hint_pool if there is one
+    """
+    pool = puzzle.hint_pool
+    if pool is None:
+        pool = get_pool(puzzle)
+    return pool.draw()
+
 
 class HintSet:
+    """
+    An individual: a list of hints and what the solver made of them
+
+    Kept small since the archive and Measures.populations hold many:
+    the hints are an int array of IDs, and the solved grids are
+    packed 2 bits per cell (Puzzle.pack) with the insights as a
+    mask, completed_puzzle is rebuilt from them when read. The
+    constant constraints read constant_checks, three ints worked
+    out from one rebuild and kept
+    """
+
+    __slots__ = (
+        "ids",
+        "puzzle",
+        "universe",
+        "hint_keys",
+        "checkpoints",
+        "grid",
+        "_valid",
+        "_loops",
+        "_insights",
+        "_checks",
+    )
+
     def __init__(
-        self, hints, puzzle) -> None:
-        self.hints = hints
+        self, hints, puzzle, checkpoints=None) -> None:
+        """
+        hints: grammar hints, or their IDs as an int array
+        (see HintUniverse), which is how the hints are kept
+        checkpoints: solver states for a prefix of hints,
+        the solver resumes after them (see LogicPuzzle.apply_hints)
+        the hints are solved the first time the result is read
+        """
+        self.universe = get_universe(puzzle)
+        if isinstance(hints, np.ndarray):
+            self.ids = hints
+        else:
+            self.ids = self.universe.encode_all(hints)
+        # keys of the hints, the same for symmetric forms
+        self.hint_keys = frozenset(self.universe.key(hint_id) for hint_id in self.ids)
         self.puzzle = puzzle  
-    
-        self.completed_puzzle, self.valid, self.loops, self.solver_insights = puzzle.apply_hints(hints)
+        self.checkpoints = [] if checkpoints is None else checkpoints
+        self.grid = None
+        self._checks = None
+
+    def __getstate__(self):
+        # the checkpoints only speed up solving children,
+        # pickle without them
+        state = {name: getattr(self, name) for name in self.__slots__ if hasattr(self, name)}
+        state["checkpoints"] = []
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def _keep(self, solved):
+        completed_puzzle, self._valid, self._loops, insights = solved
+        self._insights = insight_mask(insights)
+        self.grid = completed_puzzle.pack()
+
+    def solve(self):
+        """
+        solve the hints if that has not happened yet
+        """
+        if self.grid is None:
+            self._keep(
+                self.puzzle.apply_hints(
+                    self.compiled_hints(), checkpoints=self.checkpoints
+                )
+            )
 
-        self.insights = set()
-        
+    @property
+    def completed_puzzle(self):
+        """
+        the solved puzzle, rebuilt from the packed grid on
+        every read: each read unpacks every cell into a new
+        frozen Puzzle, so two reads give equal but different
+        objects. Keep it rather than read it again, and use
+        constant_checks for the constant constraints
+        """
+        self.solve()
+        puzzle = self.puzzle.unpack(self.grid)
+        puzzle.freeze()
+        return puzzle
+
+    def constant_checks(self):
+        """
+        return (valid, complete, violations) for the solved
+        puzzle, the masks of the grids passing grid_is_valid
+        and grid_is_complete (see Puzzle.scan_grids) and
+        num_violations, from one read of completed_puzzle
+        the first time they are asked for
+        """
+        if self._checks is None:
+            puzzle = self.completed_puzzle
+            truths, valid, complete = puzzle.scan_grids()
+            self._checks = (valid, complete, puzzle.num_violations(truths))
+        return self._checks
+
+    @property
+    def valid(self):
+        self.solve()
+        return self._valid
+
+    @property
+    def loops(self):
+        self.solve()
+        return self._loops
+
+    @property
+    def solver_insights(self):
+        self.solve()
+        return insights_of(self._insights)
+
+    @property
+    def hints(self):
+        """
+        the grammar hints, decoded from the IDs
+        """
+        return [self.universe.hint(hint_id) for hint_id in self.ids]
+
+    def compiled_hints(self):
+        return [self.universe.compiled(hint_id) for hint_id in self.ids]
+
+    def __eq__(self, other):
+        return isinstance(other, HintSet) and np.array_equal(self.ids, other.ids)
+
+    def __hash__(self):
+        return hash(self.ids.tobytes())
 
     def mutate(self, add_rate):
-        hint_copy = self.hints[:]
+        ids = self.ids
+        # the solver states of the prefix both hint lists share
+        checkpoints = self.checkpoints[:]
         roll = random.random()
-        if ((roll < 0.45) and len(hint_copy) <= 20) or len(hint_copy) <= 0:
-            new_hint = generate_hint(self.puzzle)
-            hint_copy.append(new_hint)
+        if ((roll < 0.45) and len(ids) <= 20) or len(ids) <= 0:
+            new_hint = draw_hint(self.puzzle)
+            ids = np.append(ids, self.universe.encode(new_hint))
         elif roll < 0.90:
-            index = random.randint(0, len(hint_copy) - 1)
-            del hint_copy[index]
+            index = random.randint(0, len(ids) - 1)
+            ids = np.delete(ids, index)
+            checkpoints = checkpoints[: index + 1]
         else:
-            self.swap_hints()
+            ids, checkpoints = self.swap_hints()
 
         return HintSet(
-            hint_copy,
-            self.puzzle
+            ids,
+            self.puzzle,
+            checkpoints
         )
 
     def swap_hints(self):
-        i = random.randint(0, len(self.hints) - 1)
-        j = random.randint(0, len(self.hints) - 1)
-        temp = self.hints[i]
-        self.hints[i] = self.hints[j]
-        self.hints[j] = temp
+        """
+        return a copy of the IDs with two hints swapped and
+        the checkpoints that still hold for it, the IDs of
+        self are left alone since __hash__ is taken from them
+        """
+        ids = self.ids.copy()
+        i = random.randint(0, len(ids) - 1)
+        j = random.randint(0, len(ids) - 1)
+        ids[i], ids[j] = ids[j], ids[i]
+        return ids, self.checkpoints[: min(i, j) + 1]
 
     def cross_over(self, other):
-        hints = self.hints[:] + other.hints[:]
-        random.shuffle(hints)
-        threshold = math.floor(len(hints) / 2)
+        ids = np.concatenate((self.ids, other.ids))
+        random.shuffle(ids)
+        threshold = math.floor(len(ids) / 2)
 
         return HintSet(
-            hints[0:threshold],
+            ids[0:threshold].copy(),
             self.puzzle
         ), HintSet(
-            hints[threshold : len(hints)],
+            ids[threshold : len(ids)].copy(),
             self.puzzle
         )
 
 
     def is_feasible(self):
+        # Puzzle.is_complete: every grid complete, so valid,
+        # and no truth violations
         valid = (
-            len(self.hints) > 0
+            len(self.ids) > 0
             and self.valid
-            and self.completed_puzzle.is_complete()
+            and self.constant_checks()[1] == (1 << len(self.puzzle.grids)) - 1
+            and self.constant_checks()[2] == 0
         )
 
         return valid
 
     def solver_loops(self):
-        if len(self.hints) == 0:
+        if len(self.ids) == 0:
             return 0
 
         return self.loops
 
     def hint_size(self):
-        return len(self.hints)
\ No newline at end of file
+        return len(self.ids)
\ No newline at end of file
@@ -0,0 +1,228 @@
+"""
+Every hint of a puzzle as an integer ID
+
+A term (category, entity) is numbered category * E + entity,
+where E is the most entities any category has, giving T terms.
+Each rule takes a block of IDs and numbers its hints in mixed
+radix over the fields of the compiled tuple (see CompiledHints):
+
+is:          T^2         (term1, term2)
+not:         T^2         (term1, term2)
+before:      T^2 * C * E (bef_term, aft_term, num_cat, num)
+             where num 0 is a hint with no spot count
+simple_or:   T^3         (term1, term2, ans_term)
+compound_or: T^4         (term1, term2, term1, term2)
+
+IDs are only handed out on demand, the universe is never listed.
+They depend only on the categories of the puzzle, so they are
+stable across runs and can index anything precomputed per hint
+
+The key of a hint is the ID of its canonical form, which is the
+same for the symmetric forms get_duplicates lists: "is" and "not"
+with their two terms swapped, simple_or with its two alternatives
+swapped, and compound_or with either part or the parts swapped
+"""
+
+from bisect import bisect_right
+
+import numpy as np
+
+from CompiledHints import (
+    IS,
+    NOT,
+    BEFORE,
+    SIMPLE_OR,
+    COMPOUND_OR,
+    compile_hint,
+    uncompile_hint,
+)
+
+
+class HintUniverse:
+    def __init__(self, puzzle):
+        """
+        keeps the categories and lookup of puzzle, which
+        is all compile_hint and uncompile_hint read, and
+        not the puzzle with whatever solver state it has
+        """
+        self.categories = puzzle.categories
+        self.lookup = puzzle.lookup
+        self.num_categories = len(self.categories)
+        self.num_entities = max(len(cat.entities) for cat in self.categories)
+        terms = self.num_categories * self.num_entities
+        self.num_terms = terms
+
+        self.ops = [IS, NOT, BEFORE, SIMPLE_OR, COMPOUND_OR]
+        sizes = [
+            terms**2,
+            terms**2,
+            terms**2 * self.num_categories * self.num_entities,
+            terms**3,
+            terms**4,
+        ]
+        self.offsets = [0]
+        for size in sizes:
+            self.offsets.append(self.offsets[-1] + size)
+        self.size = self.offsets[-1]
+
+        # decoded forms and keys, filled as IDs come up
+        self.compiled_hints = {}
+        self.grammar_hints = {}
+        self.keys = {}
+
+    def __getstate__(self):
+        # every HintSet holds the universe, pickle it
+        # without the decoded forms, they are made again
+        state = self.__dict__.copy()
+        state["compiled_hints"] = {}
+        state["grammar_hints"] = {}
+        state["keys"] = {}
+        return state
+
+    def __len__(self):
+        return self.size
+
+    def _term(self, cat, ent):
+        return cat * self.num_entities + ent
+
+    def _untie(self, term):
+        return divmod(term, self.num_entities)
+
+    def _pair(self, terms):
+        return self._term(terms[0], terms[1]) * self.num_terms + self._term(
+            terms[2], terms[3]
+        )
+
+    def _unpair(self, pair):
+        term1, term2 = divmod(pair, self.num_terms)
+        return self._untie(term1) + self._untie(term2)
+
+    def encode(self, hint):
+        """
+        return the ID of a grammar or compiled hint
+        """
+        compiled = compile_hint(self, hint)
+        op = compiled[0]
+        if op == IS or op == NOT:
+            index = self._pair(compiled[1:5])
+        elif op == BEFORE:
+            num = 0 if compiled[6] is None else compiled[6]
+            index = (
+                self._pair(compiled[1:5]) * self.num_categories + compiled[5]
+            ) * self.num_entities + num
+        elif op == SIMPLE_OR:
+            index = self._pair(compiled[1:5]) * self.num_terms + self._term(
+                compiled[5], compiled[6]
+            )
+        elif op == COMPOUND_OR:
+            index = self._pair(compiled[1]) * self.num_terms**2 + self._pair(
+                compiled[2]
+            )
+        else:
+            raise ValueError("no ID for hint " + str(hint))
+        return self.offsets[op] + index
+
+    def encode_all(self, hints):
+        """
+        return the IDs of a list of hints as an int array
+        """
+        return np.array([self.encode(hint) for hint in hints], dtype=np.int64)
+
+    def compiled(self, hint_id):
+        """
+        return the compiled tuple of an ID
+        """
+        hint_id = int(hint_id)
+        compiled = self.compiled_hints.get(hint_id)
+        if compiled is not None:
+            return compiled
+
+        op = self.ops[bisect_right(self.offsets, hint_id) - 1]
+        index = hint_id - self.offsets[op]
+        if op == IS or op == NOT:
+            compiled = (op,) + self._unpair(index)
+        elif op == BEFORE:
+            index, num = divmod(index, self.num_entities)
+            pair, num_cat = divmod(index, self.num_categories)
+            compiled = (BEFORE,) + self._unpair(pair) + (
+                num_cat,
+                None if num == 0 else num,
+            )
+        elif op == SIMPLE_OR:
+            pair, ans = divmod(index, self.num_terms)
+            compiled = (SIMPLE_OR,) + self._unpair(pair) + self._untie(ans)
+        else:
+            pair1, pair2 = divmod(index, self.num_terms**2)
+            compiled = (COMPOUND_OR, self._unpair(pair1), self._unpair(pair2))
+
+        self.compiled_hints[hint_id] = compiled
+        return compiled
+
+    def hint(self, hint_id):
+        """
+        return the grammar hint of an ID,
+        shared by every caller so not to be changed
+        """
+        hint_id = int(hint_id)
+        hint = self.grammar_hints.get(hint_id)
+        if hint is None:
+            hint = uncompile_hint(self, self.compiled(hint_id))
+            self.grammar_hints[hint_id] = hint
+        return hint
+
+    def canonical(self, hint):
+        """
+        return the canonical compiled tuple of a grammar
+        or compiled hint, the least of its symmetric forms
+        """
+        compiled = compile_hint(self, hint)
+        op = compiled[0]
+        if op == IS or op == NOT:
+            return (op,) + _least_pair(compiled[1:5])
+        elif op == SIMPLE_OR:
+            return (op,) + _least_pair(compiled[1:5]) + compiled[5:]
+        elif op == COMPOUND_OR:
+            part1 = _least_pair(compiled[1])
+            part2 = _least_pair(compiled[2])
+            return (op,) + tuple(sorted((part1, part2)))
+        return compiled
+
+    def key(self, hint_id):
+        """
+        return the key of an ID
+        """
+        hint_id = int(hint_id)
+        key = self.keys.get(hint_id)
+        if key is None:
+            key = self.encode(self.canonical(self.compiled(hint_id)))
+            self.keys[hint_id] = key
+        return key
+
+    def hint_key(self, hint):
+        """
+        return the key of a grammar or compiled hint
+        """
+        return self.encode(self.canonical(hint))
+
+
+def _least_pair(terms):
+    """
+    (cat1, ent1, cat2, ent2) or (cat2, ent2, cat1, ent1),
+    whichever is less
+    """
+    terms = tuple(terms)
+    return min(terms, terms[2:] + terms[:2])
+
+
+_universes = {}
+
+def get_universe(puzzle):
+    """
+    return the HintUniverse for the categories of a puzzle
+    """
+    key = tuple(puzzle.categories)
+    universe = _universes.get(key)
+    if universe is None:
+        universe = HintUniverse(puzzle)
+        _universes[key] = universe
+    return universe
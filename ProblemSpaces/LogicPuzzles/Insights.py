@@ -35,3 +35,35 @@ class Insight(Enum):
     REPAIR = 100  # Repair broken puzzle
 
 ALL_INSIGHTS = {insight for insight in Insight}
+
+
+class InsightBit:
+    """
+    1 << insight.value for every insight, as
+    InsightBit.CROSS_OUT etc.
+    """
+
+
+for insight in Insight:
+    setattr(InsightBit, insight.name, 1 << insight.value)
+
+
+def insight_mask(insights):
+    """
+    return a set of insights as an int with
+    bit insight.value set for each insight,
+    ints are returned as they are
+    """
+    if isinstance(insights, int):
+        return insights
+    mask = 0
+    for insight in insights:
+        mask |= 1 << insight.value
+    return mask
+
+
+def insights_of(mask):
+    """
+    return the set of insights in an insight_mask
+    """
+    return {insight for insight in Insight if mask & (1 << insight.value)}
@@ -1,9 +1,20 @@
 from itertools import combinations 
+import sys
 
 import random
-from copy import deepcopy
 from enum import Enum
-from Insights import Insight 
+from Insights import Insight, InsightBit, insight_mask, insights_of
+from Transitives import TransitiveIndex, bits
+import CompiledHints
+from CompiledHints import compile_hint, compile_hints
+from SolverCache import SolverCache, solver_key
+from SolverProfile import SolverProfile, RULE_NAMES
+from NogoodStore import NogoodStore
+from StateTrie import StateTrie
+
+# 2 bit codes of the symbols in Puzzle.pack
+PACKED_SYMBOLS = ("*", "X", "O")
+PACKED_CODES = {"*": 0, "X": 1, "O": 2}
 
 ###### HELPER FUNCTIONS ####### 
 def cross_out(puzzle, cat1, cat2, ent1, ent2):
@@ -11,35 +22,60 @@ def cross_out(puzzle, cat1, cat2, ent1, ent2):
     places Xs in the all the rows and columns
     after you found a correct hint
     """
+    lookup = puzzle.lookup
+    return cross_out_at(
+        puzzle,
+        lookup.category_index[cat1],
+        lookup.category_index[cat2],
+        lookup.entity_index[cat1][ent1],
+        lookup.entity_index[cat2][ent2],
+    )
+
+
+def cross_out_at(puzzle, cat1, cat2, ent1, ent2):
+    """
+    cross_out with categories and entities
+    given by index
+    """
     is_valid = True
 
     # x out the cross sections
-    for ent in cat1.entities:
+    for ent in range(puzzle.size(cat1)):
         if ent != ent1:
-            symb = puzzle.get_symbol(cat1, cat2, ent, ent2)
+            symb = puzzle.symbol_at(cat1, cat2, ent, ent2)
             if symb == "*":
-                puzzle.answer(cat1, cat2, ent, ent2, "X")
+                puzzle.answer_at(cat1, cat2, ent, ent2, "X")
             elif symb == "O":
                 is_valid = False
 
-    for ent in cat2.entities:
+    for ent in range(puzzle.size(cat2)):
         if ent != ent2:
-            symb = puzzle.get_symbol(cat1, cat2, ent1, ent)
+            symb = puzzle.symbol_at(cat1, cat2, ent1, ent)
             if symb == "*":
-                puzzle.answer(cat1, cat2, ent1, ent, "X")
+                puzzle.answer_at(cat1, cat2, ent1, ent, "X")
             elif symb == "O":
                 is_valid = False
 
     return is_valid
 
 
+def _names(puzzle, cat, ent):
+    """
+    return (category title, entity) for
+    a category and entity given by index
+    """
+    category = puzzle.categories[cat]
+    return category.title, category.entities[ent]
+
+
 def apply_is(puzzle, terms, forbidden_insights=set(), return_entities = False):
     """
     Apply the is rule to puzzle, will always complete in one step
     puzzle: the current state of the grid
-    terms: the terms making up the is hint's grammar
+    terms: the compiled terms of the hint (see CompiledHints)
     return: applied, is_valid, complete
     """
+    forbidden_insights = insight_mask(forbidden_insights)
     applied = False
     is_valid = True
     complete = False  
@@ -51,16 +87,16 @@ def apply_is(puzzle, terms, forbidden_insights=set(), return_entities = False):
 
     entities = []
 
-    current_term = puzzle.get_symbol(cat1, cat2, ent1, ent2)
+    current_term = puzzle.symbol_at(cat1, cat2, ent1, ent2)
 
-    if current_term == "*" and Insight.APPLY_IS not in forbidden_insights:
+    if current_term == "*" and not forbidden_insights & InsightBit.APPLY_IS:
         applied = True
         complete = True
-        puzzle.answer(cat1, cat2, ent1, ent2, "O")
-        is_valid = cross_out(puzzle, cat1, cat2, ent1, ent2)
+        puzzle.answer_at(cat1, cat2, ent1, ent2, "O")
+        is_valid = cross_out_at(puzzle, cat1, cat2, ent1, ent2)
         if is_valid:
             insights.add(Insight.APPLY_IS)
-            entities.append({"type": "is", "ents":((cat1.title, ent1), (cat2.title, ent2))})
+            entities.append({"type": "is", "ents":(_names(puzzle, cat1, ent1), _names(puzzle, cat2, ent2))})
 
     elif current_term == "X":
         # something logic error occured
@@ -85,13 +121,73 @@ class Category:
     def __str__(self):
         return self.title
 
+
+class Lookup:
+    """
+    Index tables for one list of categories, built once
+    and shared by every puzzle over those categories
+
+    entity_index[cat][ent]: position of ent in cat.entities
+    entity_ids[cat][ent]: id of ent counting through every category
+    offsets[i]: id of the first entity of categories[i]
+    entities[id]: (cat, ent) for an entity id
+    pairs[cat1, cat2]: (grid key, transposed) where transposed
+        means cat1 runs down the left of the grid, not the top
+    index_pairs[i][j]: pairs for categories[i] and categories[j]
+    """
+
+    def __init__(self, categories, grid_cats):
+        self.categories = categories
+        self.category_index = {}
+        self.titles = {}
+        self.entity_index = {}
+        self.entity_ids = {}
+        self.offsets = []
+        self.entities = []
+        self.category_of = []
+        for c, cat in enumerate(categories):
+            self.category_index[cat] = c
+            self.titles.setdefault(cat.title, cat)
+            offset = len(self.entities)
+            self.offsets.append(offset)
+            index = {}
+            for e, ent in enumerate(cat.entities):
+                index.setdefault(ent, e)
+                self.entities.append((cat, ent))
+                self.category_of.append(c)
+            self.entity_index[cat] = index
+            self.entity_ids[cat] = {ent: offset + e for ent, e in index.items()}
+
+        self.pairs = {}
+        for key, top_cat, left_cat in grid_cats:
+            self.pairs[top_cat, left_cat] = (key, False)
+            self.pairs[left_cat, top_cat] = (key, True)
+        self.index_pairs = [
+            [self.pairs.get((cat1, cat2)) for cat2 in categories]
+            for cat1 in categories
+        ]
+
+
+_lookups = {}
+
+def get_lookup(categories, grid_cats):
+    """
+    return the shared Lookup for a list of categories
+    """
+    lookup = _lookups.get(tuple(categories))
+    if lookup is None:
+        lookup = Lookup(categories, grid_cats)
+        _lookups[tuple(categories)] = lookup
+    return lookup
+
 def apply_not(puzzle, terms, forbidden_insights=set(), return_entities=False):
     """
     Apply the not rule to puzzle, will always complete in one step
     puzzle: the current state of the grid
-    terms: the terms making up the is hint's grammar
+    terms: the compiled terms of the hint (see CompiledHints)
     return: applied, is_valid, complete
     """
+    forbidden_insights = insight_mask(forbidden_insights)
     applied = False
     is_valid = True
     complete = False  
@@ -102,14 +198,14 @@ def apply_not(puzzle, terms, forbidden_insights=set(), return_entities=False):
     ent2 = terms[3]
     entities = [] 
 
-    current_term = puzzle.get_symbol(cat1, cat2, ent1, ent2)
+    current_term = puzzle.symbol_at(cat1, cat2, ent1, ent2)
 
-    if current_term == "*" and Insight.APPLY_NOT not in forbidden_insights:
-        puzzle.answer(cat1, cat2, ent1, ent2, "X")
+    if current_term == "*" and not forbidden_insights & InsightBit.APPLY_NOT:
+        puzzle.answer_at(cat1, cat2, ent1, ent2, "X")
         applied = True
         complete = True
         insights.add(Insight.APPLY_NOT)
-        entities.append({"type": "not", "ents": ((cat1.title, ent1), (cat2.title, ent2))})
+        entities.append({"type": "not", "ents": (_names(puzzle, cat1, ent1), _names(puzzle, cat2, ent2))})
     elif current_term == "O":
         is_valid = False
         complete = True
@@ -121,105 +217,148 @@ def apply_not(puzzle, terms, forbidden_insights=set(), return_entities=False):
     return applied, is_valid, complete, insights
 
 def find_openings(puzzle, slow=True, return_entities=False, forbidden_insights=set()):
+    """
+    slow: judge every row and column on the state at the start of the pass,
+    and leave the puzzle untouched if the pass finds a contradiction.
+    Slow passes only recheck the rows and columns written since the last pass.
+    """
+    forbidden_insights = insight_mask(forbidden_insights)
+    if not slow:
+        return _scan_openings(puzzle, None, slow, return_entities, forbidden_insights)
+
+    if forbidden_insights != puzzle.openings_forbidden:
+        # Lines passed over under other rules may have openings now.
+        puzzle.mark_all_dirty()
+        puzzle.openings_forbidden = forbidden_insights
+
+    todo = puzzle.take_dirty()
+    mark = puzzle.snapshot()
+    result = _scan_openings(puzzle, todo, slow, return_entities, forbidden_insights)
+    if not result[1]:
+        puzzle.rollback(mark)
+        puzzle.mark_dirty(todo)
+    puzzle.release()
+    return result
+
+def _scan_openings(puzzle, todo, slow, return_entities, forbidden_insights):
+    """
+    todo: the rows and columns to check for each grid key,
+    None checks every line
+    """
     applied = False
     complete = False
     is_valid = True
     insights = set()
     entities = []
-    # The puzzle to update. Update in place in normal mode; in slow mode update a copy.
-    update_puzzle = puzzle
-    if slow:
-        update_puzzle = deepcopy(puzzle)
+    cross_out_ok = not forbidden_insights & InsightBit.CROSS_OUT
+    opening_ok = not forbidden_insights & InsightBit.OPENING
 
     # For every combination of categories:
     for cat1 in puzzle.categories:
         for cat2 in puzzle.categories:
             grid = puzzle.get_grid(cat1, cat2)
-            if grid != None:
+            if grid is not None:
+                if todo is None:
+                    rows = range(len(grid))
+                    columns = range(len(grid[0]))
+                elif puzzle.lookup.pairs[cat1, cat2][0] in todo:
+                    rows, columns = todo[puzzle.lookup.pairs[cat1, cat2][0]]
+                    rows = sorted(rows)
+                    columns = sorted(columns)
+                else:
+                    # Nothing in this grid changed since the last pass.
+                    continue
+                if slow:
+                    # Updates land in this grid; count its lines before they do.
+                    row_counts = puzzle.line_counts(grid, 1, rows)
+                    column_counts = puzzle.line_counts(grid, 0, columns)
+
                 # For each row:
-                for i, row in enumerate(grid):
-                    blanks = [i for i in range(len(row)) if row[i] == "*"]
-                    os = [i for i in range(len(row)) if row[i] == "O"]
-                    if len(blanks) == 0 and len(os) == 0:
+                for n, i in enumerate(rows):
+                    if slow:
+                        blanks, os, blank_at, o_at = row_counts[n]
+                    else:
+                        blanks, os, blank_at, o_at = puzzle.line_counts(grid, 1, [i])[0]
+                    if blanks == 0 and os == 0:
                         # The row is all Xs; contradiction
                         is_valid = False
                         applied = False
                         return applied, is_valid, complete, insights
-                    if len(os) > 1:
+                    if os > 1:
                         # There are multiple Os; this is a contradiction
                         is_valid = False
                         applied = False
                         return applied, is_valid, complete, insights
                     if (
-                        len(os) == 1
-                        and len(blanks) >= 1
-                        and Insight.CROSS_OUT not in forbidden_insights
+                        os == 1
+                        and blanks >= 1
+                        and cross_out_ok
                     ):
                         # There is an O; the rest of the row and column can be crossed out.
-                        ent1 = cat1.entities[os[0]]
+                        ent1 = cat1.entities[o_at]
                         ent2 = cat2.entities[i]
                         applied = True
-                        is_valid = cross_out(update_puzzle, cat1, cat2, ent1, ent2)
+                        is_valid = cross_out(puzzle, cat1, cat2, ent1, ent2)
                         if not is_valid:
                             applied = False
                             return applied, is_valid, complete, insights
                         insights.add(Insight.CROSS_OUT)
                     # If there is only 1 blank value:
-                    elif len(blanks) == 1 and Insight.OPENING not in forbidden_insights:
-                        ent1 = cat1.entities[blanks[0]]
+                    elif blanks == 1 and opening_ok:
+                        ent1 = cat1.entities[blank_at]
                         ent2 = cat2.entities[i]
                         applied = True
                         # Answer it as 0.
-                        update_puzzle.answer(cat1, cat2, ent1, ent2, "O")
-                        is_valid = cross_out(update_puzzle, cat1, cat2, ent1, ent2)
+                        puzzle.answer(cat1, cat2, ent1, ent2, "O")
+                        is_valid = cross_out(puzzle, cat1, cat2, ent1, ent2)
                         if not is_valid:
                             applied = False
                             return applied, is_valid, complete, insights
                         insights.add(Insight.OPENING)
                 # For each column:
-                for j in range(len(grid[0])):
-                    blanks = [i for i in range(len(grid)) if grid[i][j] == "*"]
-                    os = [i for i in range(len(grid)) if grid[i][j] == "O"]
-                    if len(blanks) == 0 and len(os) == 0:
+                for n, j in enumerate(columns):
+                    if slow:
+                        blanks, os, blank_at, o_at = column_counts[n]
+                    else:
+                        blanks, os, blank_at, o_at = puzzle.line_counts(grid, 0, [j])[0]
+                    if blanks == 0 and os == 0:
                         # The row is all Xs; contradiction
                         is_valid = False
                         applied = False
                         return applied, is_valid, complete, insights
-                    if len(os) > 1:
+                    if os > 1:
                         # There are multiple Os; this is a contradiction
                         is_valid = False
                         applied = False
                         return applied, is_valid, complete, insights
                     if (
-                        len(os) == 1
-                        and len(blanks) >= 1
-                        and Insight.CROSS_OUT not in forbidden_insights
+                        os == 1
+                        and blanks >= 1
+                        and cross_out_ok
                     ):
                         # There is an O; the rest of the row and column can be crossed out.
                         ent1 = cat1.entities[j]
-                        ent2 = cat2.entities[os[0]]
+                        ent2 = cat2.entities[o_at]
                         applied = True
-                        is_valid = cross_out(update_puzzle, cat1, cat2, ent1, ent2)
+                        is_valid = cross_out(puzzle, cat1, cat2, ent1, ent2)
                         entities.append({"type":"cross_out", "ents":[(cat1.title, ent1), (cat2.title, ent2)]})
                         if not is_valid:
                             applied = False
                             return applied, is_valid, complete, insights
                         insights.add(Insight.CROSS_OUT)
                     # If there is only one blank value:
-                    elif len(blanks) == 1 and Insight.OPENING not in forbidden_insights:
+                    elif blanks == 1 and opening_ok:
                         ent1 = cat1.entities[j]
-                        ent2 = cat2.entities[blanks[0]]
+                        ent2 = cat2.entities[blank_at]
                         applied = True
                         # Answer it as 0.
-                        update_puzzle.answer(cat1, cat2, ent1, ent2, "O")
+                        puzzle.answer(cat1, cat2, ent1, ent2, "O")
                         entities.append({"type":"opening", "ents":[(cat1.title, ent1), (cat2.title, ent2)]})
-                        is_valid = cross_out(update_puzzle, cat1, cat2, ent1, ent2)
+                        is_valid = cross_out(puzzle, cat1, cat2, ent1, ent2)
                         if not is_valid:
                             applied = False
                             return applied, is_valid, complete, insights
                         insights.add(Insight.OPENING)
-    # Apply updates.
-    puzzle.grids = update_puzzle.grids
     if return_entities:
         return applied, is_valid, complete, insights, entities
     return applied, is_valid, complete, insights
@@ -227,7 +366,74 @@ def find_openings(puzzle, slow=True, return_entities=False, forbidden_insights=s
 def find_transitives(puzzle, forbidden_insights=set(), slow=False, return_entities = False):
     """
     slow: set to True to apply only the first valid insight.
+
+    The deductions and the insights they are reported under come
+    from a scan over the known relations of every entity. The scan
+    is skipped when the union-find classes of the puzzle show it
+    has nothing to do (see _transitives_pending), which is most of
+    the calls, as every solve_hint ends on a pass that applies nothing
+    """
+    forbidden_insights = insight_mask(forbidden_insights)
+    if not (slow or return_entities) and not _transitives_pending(
+        puzzle, forbidden_insights
+    ):
+        return False, True, False, set()
+    return _scan_transitives(puzzle, forbidden_insights, slow, return_entities)
+
+def _transitives_pending(puzzle, forbidden_insights):
     """
+    return whether _scan_transitives would change the
+    puzzle or find it invalid
+
+    The scan links A to C through a B both are linked to, so it
+    does nothing only when every union-find class is linked in
+    full: a class that is not has two members two links apart.
+    Then A -> B and B !> C is the same as any member of A's class
+    being crossed out with C, and two entities outside each
+    other's class with no "X" between them are undetermined
+    """
+    index = puzzle.transitive_index()
+    abc_false = not forbidden_insights & InsightBit.TRANS_ABC_FALSE
+
+    for members, excluded in index.classes():
+        for k, a in enumerate(members):
+            catA, entA = index.entities[a]
+            for c in members[k + 1 :]:
+                catC, entC = index.entities[c]
+                if catA is catC:
+                    return True
+                if puzzle.get_symbol(catA, catC, entA, entC) != "O":
+                    return True
+        for a in members:
+            catA, entA = index.entities[a]
+            for c in bits(excluded & ~index.category_masks[index.category_of[a]]):
+                catC, entC = index.entities[c]
+                sy = puzzle.get_symbol(catA, catC, entA, entC)
+                if sy == "O" or (sy == "*" and abc_false):
+                    return True
+
+    if not forbidden_insights & InsightBit.TRANS_SETS:
+        size = len(index.entities)
+        num_cats = len(index.categories)
+        for a in range(size):
+            catA_index = index.category_of[a]
+            for b in range(a + 1, size):
+                catB_index = index.category_of[b]
+                if (
+                    catB_index == catA_index
+                    or index.crossed[a] >> b & 1
+                    or index.find(a) == index.find(b)
+                ):
+                    # Only undetermined pairs
+                    continue
+                for catC_index in range(num_cats):
+                    if catC_index != catA_index and catC_index != catB_index and not (
+                        index.possible(a, catC_index) & index.possible(b, catC_index)
+                    ):
+                        return True
+    return False
+
+def _scan_transitives(puzzle, forbidden_insights, slow, return_entities):
     applied = False
     complete = False
     is_valid = True
@@ -260,7 +466,7 @@ def find_transitives(puzzle, forbidden_insights=set(), slow=False, return_entiti
                             sy = puzzle.get_symbol(catA, catC, entA, entC)
                             if (
                                 sy == "*"
-                                and Insight.TRANS_ABC_TRUE not in forbidden_insights
+                                and not forbidden_insights & InsightBit.TRANS_ABC_TRUE
                             ):
                                 insights.add(Insight.TRANS_ABC_TRUE)
                                 applied = True
@@ -279,7 +485,7 @@ def find_transitives(puzzle, forbidden_insights=set(), slow=False, return_entiti
                             sy = puzzle.get_symbol(catA, catC, entA, entC)
                             if (
                                 sy == "*"
-                                and Insight.TRANS_ABC_FALSE not in forbidden_insights
+                                and not forbidden_insights & InsightBit.TRANS_ABC_FALSE
                             ):
                                 insights.add(Insight.TRANS_ABC_FALSE)
                                 applied = True
@@ -328,7 +534,7 @@ def find_transitives(puzzle, forbidden_insights=set(), slow=False, return_entiti
                             setB = set(B_possibles)
                             if (
                                 not (setA & setB)
-                                and Insight.TRANS_SETS not in forbidden_insights
+                                and not forbidden_insights & InsightBit.TRANS_SETS
                             ):
                                 # A and B don't share any possibilities; A != B
                                 sy = puzzle.get_symbol(catA, catB, entA, entB)
@@ -352,15 +558,16 @@ def apply_before(puzzle, terms, forbidden_insights=set(), slow=False, return_ent
     """
     apply the before rule to the puzzle
     puzzle: the current state of the grid
-    terms: the terms making up the is hint's grammar
+    terms: the compiled terms of the hint (see CompiledHints)
     slow: set to True to apply only the first insight
     return: applied, is_valid, complete
     """
+    forbidden_insights = insight_mask(forbidden_insights)
     applied = False
     complete = False
     is_valid = True
     insights = set()
-    numbered = len(terms) == 6
+    numbered = terms[5] is not None
 
     bef_cat = terms[0]
     bef_ent = terms[1]  # bef entity is before aft_ent
@@ -376,12 +583,12 @@ def apply_before(puzzle, terms, forbidden_insights=set(), slow=False, return_ent
 
     # If A < B and A, B are not in the same category, then A is not B.
     if bef_cat != aft_cat:
-        sy = puzzle.get_symbol(bef_cat, aft_cat, bef_ent, aft_ent)
-        if sy == "*" and Insight.BEFORE_DIFF_CAT not in forbidden_insights:
+        sy = puzzle.symbol_at(bef_cat, aft_cat, bef_ent, aft_ent)
+        if sy == "*" and not forbidden_insights & InsightBit.BEFORE_DIFF_CAT:
             insights.add(Insight.BEFORE_DIFF_CAT)
             applied = True
-            puzzle.answer(bef_cat, aft_cat, bef_ent, aft_ent, "X")
-            entities.append({"type": "before_diff_cat", "ents":((bef_cat.title, bef_ent), (aft_cat.title, aft_ent))})
+            puzzle.answer_at(bef_cat, aft_cat, bef_ent, aft_ent, "X")
+            entities.append({"type": "before_diff_cat", "ents":(_names(puzzle, bef_cat, bef_ent), _names(puzzle, aft_cat, aft_ent))})
             if slow:
                 if return_entities: 
                     return applied, is_valid, complete, insights, entities 
@@ -394,10 +601,10 @@ def apply_before(puzzle, terms, forbidden_insights=set(), slow=False, return_ent
 
     # Get all the current symbols for the two entities in the num category
     before_symbols = [
-        puzzle.get_symbol(bef_cat, num_cat, bef_ent, ent) for ent in num_cat.entities
+        puzzle.symbol_at(bef_cat, num_cat, bef_ent, ent) for ent in range(puzzle.size(num_cat))
     ]
     after_symbols = [
-        puzzle.get_symbol(aft_cat, num_cat, aft_ent, ent) for ent in num_cat.entities
+        puzzle.symbol_at(aft_cat, num_cat, aft_ent, ent) for ent in range(puzzle.size(num_cat))
     ]
 
     # if both entities have answer, we can determine if this rule is valid
@@ -440,17 +647,17 @@ def apply_before(puzzle, terms, forbidden_insights=set(), slow=False, return_ent
                     needed_insight = Insight.APPLY_BEFORE_N_SPOTS
             else:
                 needed_insight = Insight.APPLY_BEFORE_UNDEFINED_SPOTS
-            if needed_insight not in forbidden_insights:
+            if not forbidden_insights & 1 << needed_insight.value:
                 insights.add(needed_insight)
                 complete = True
                 aft_index = pos_aft_index[0]
                 applied = True
-                puzzle.answer(
-                    aft_cat, num_cat, aft_ent, num_cat.entities[aft_index], "O"
+                puzzle.answer_at(
+                    aft_cat, num_cat, aft_ent, aft_index, "O"
                 )
-                entities.append({"type": "apply_before", "ents": ((aft_cat.title, aft_ent), (bef_cat.title, bef_ent), (num_cat.title, num_cat.entities[aft_index]))})
-                is_valid = cross_out(
-                    puzzle, aft_cat, num_cat, aft_ent, num_cat.entities[aft_index]
+                entities.append({"type": "apply_before", "ents": (_names(puzzle, aft_cat, aft_ent), _names(puzzle, bef_cat, bef_ent), _names(puzzle, num_cat, aft_index))})
+                is_valid = cross_out_at(
+                    puzzle, aft_cat, num_cat, aft_ent, aft_index
                 )
                 if not is_valid or slow:
                     if return_entities: 
@@ -458,10 +665,10 @@ def apply_before(puzzle, terms, forbidden_insights=set(), slow=False, return_ent
                     return applied, is_valid, complete, insights
         else:
             for i in range(0, bef_index):
-                sy = puzzle.get_symbol(aft_cat, num_cat, aft_ent, num_cat.entities[i])
+                sy = puzzle.symbol_at(aft_cat, num_cat, aft_ent, i)
                 if sy == "*":
                     applied = True
-                    puzzle.answer(aft_cat, num_cat, aft_ent, num_cat.entities[i], "X")
+                    puzzle.answer_at(aft_cat, num_cat, aft_ent, i, "X")
                 elif sy == "O":
                     complete = True
                     is_valid = False
@@ -497,27 +704,27 @@ def apply_before(puzzle, terms, forbidden_insights=set(), slow=False, return_ent
                     needed_insight = Insight.APPLY_BEFORE_N_SPOTS
             else:
                 needed_insight = Insight.APPLY_BEFORE_UNDEFINED_SPOTS
-            if needed_insight not in forbidden_insights:
+            if not forbidden_insights & 1 << needed_insight.value:
                
                 insights.add(needed_insight)
                 complete = True
                 bef_index = pos_bef_index[0]
                 applied = True
-                entities.append({"type": "apply_before", "ents": ((bef_cat.title, bef_ent), (aft_cat.title, aft_ent), (num_cat.title, num_cat.entities[bef_index]))})
-                puzzle.answer(
-                    bef_cat, num_cat, bef_ent, num_cat.entities[bef_index], "O"
+                entities.append({"type": "apply_before", "ents": (_names(puzzle, bef_cat, bef_ent), _names(puzzle, aft_cat, aft_ent), _names(puzzle, num_cat, bef_index))})
+                puzzle.answer_at(
+                    bef_cat, num_cat, bef_ent, bef_index, "O"
                 )
-                is_valid = cross_out(
-                    puzzle, bef_cat, num_cat, bef_ent, num_cat.entities[bef_index]
+                is_valid = cross_out_at(
+                    puzzle, bef_cat, num_cat, bef_ent, bef_index
                 )
                 if not is_valid or slow:
                     return applied, is_valid, complete, insights
         else:
             for i in range(aft_index, len(before_symbols)):
-                sy = puzzle.get_symbol(bef_cat, num_cat, bef_ent, num_cat.entities[i])
+                sy = puzzle.symbol_at(bef_cat, num_cat, bef_ent, i)
                 if sy == "*":
                     applied = True
-                    puzzle.answer(bef_cat, num_cat, bef_ent, num_cat.entities[i], "X")
+                    puzzle.answer_at(bef_cat, num_cat, bef_ent, i, "X")
                 elif sy == "O":
                     complete = True
                     is_valid = False
@@ -530,30 +737,30 @@ def apply_before(puzzle, terms, forbidden_insights=set(), slow=False, return_ent
     # Narrow down possiblities with no information for entities yet
     # The before entity can't be in the last num spots (or there won't be room for the after entity)
     for i in range(len(before_symbols) - num, len(before_symbols)):
-        sy = puzzle.get_symbol(bef_cat, num_cat, bef_ent, num_cat.entities[i])
+        sy = puzzle.symbol_at(bef_cat, num_cat, bef_ent, i)
         needed_insight = Insight.BEFORE_ONE_SPOT_NOINFO
         if num > 1:
             needed_insight = Insight.BEFORE_N_SPOTS_NOINFO
-        if sy == "*" and needed_insight not in forbidden_insights:
+        if sy == "*" and not forbidden_insights & 1 << needed_insight.value:
             insights.add(needed_insight)
             applied = True
-            puzzle.answer(bef_cat, num_cat, bef_ent, num_cat.entities[i], "X")
-            entities.append({"type": "before_noinfo", "ents":((bef_cat.title, bef_ent), (num_cat.title, num_cat.entities[i]))})
+            puzzle.answer_at(bef_cat, num_cat, bef_ent, i, "X")
+            entities.append({"type": "before_noinfo", "ents":(_names(puzzle, bef_cat, bef_ent), _names(puzzle, num_cat, i))})
         elif sy == "O":
             complete = True
             is_valid = False
             return applied, is_valid, complete, insights
     # And the inverse is true for the after entity
     for i in range(0, num):
-        sy = puzzle.get_symbol(aft_cat, num_cat, aft_ent, num_cat.entities[i])
+        sy = puzzle.symbol_at(aft_cat, num_cat, aft_ent, i)
         needed_insight = Insight.BEFORE_ONE_SPOT_NOINFO
         if num > 1:
             needed_insight = Insight.BEFORE_N_SPOTS_NOINFO
-        if sy == "*" and needed_insight not in forbidden_insights:
+        if sy == "*" and not forbidden_insights & 1 << needed_insight.value:
             insights.add(needed_insight)
             applied = True
-            entities.append({"type": "before_noinfo", "ents":((aft_cat.title, aft_ent), (num_cat.title, num_cat.entities[i]))})
-            puzzle.answer(aft_cat, num_cat, aft_ent, num_cat.entities[i], "X")
+            entities.append({"type": "before_noinfo", "ents":(_names(puzzle, aft_cat, aft_ent), _names(puzzle, num_cat, i))})
+            puzzle.answer_at(aft_cat, num_cat, aft_ent, i, "X")
         elif sy == "O":
             complete = True
             is_valid = False
@@ -569,22 +776,22 @@ def apply_before(puzzle, terms, forbidden_insights=set(), slow=False, return_ent
         for i in range(len(before_symbols) - num):
             if before_symbols[i] != "X":
                 break
-            sy = puzzle.get_symbol(aft_cat, num_cat, aft_ent, num_cat.entities[i + num])
-            if sy == "*" and Insight.BEFORE_N_SPOTS_SHIFT not in forbidden_insights:
+            sy = puzzle.symbol_at(aft_cat, num_cat, aft_ent, i + num)
+            if sy == "*" and not forbidden_insights & InsightBit.BEFORE_N_SPOTS_SHIFT:
                 insights.add(Insight.BEFORE_N_SPOTS_SHIFT)
                 applied = True
-                puzzle.answer(aft_cat, num_cat, aft_ent, num_cat.entities[i + num], "X")
-                entities.append({"type": "spots_shift", "ents":((aft_cat.title, aft_ent), (bef_cat.title, bef_ent), (num_cat.title, num_cat.entities[i + num]))})
+                puzzle.answer_at(aft_cat, num_cat, aft_ent, i + num, "X")
+                entities.append({"type": "spots_shift", "ents":(_names(puzzle, aft_cat, aft_ent), _names(puzzle, bef_cat, bef_ent), _names(puzzle, num_cat, i + num))})
 
         for i in range(len(after_symbols) - 1, num - 1, -1):
             if after_symbols[i] != "X":
                 break
-            sy = puzzle.get_symbol(bef_cat, num_cat, bef_ent, num_cat.entities[i - num])
-            if sy == "*" and Insight.BEFORE_N_SPOTS_SHIFT not in forbidden_insights:
+            sy = puzzle.symbol_at(bef_cat, num_cat, bef_ent, i - num)
+            if sy == "*" and not forbidden_insights & InsightBit.BEFORE_N_SPOTS_SHIFT:
                 insights.add(Insight.BEFORE_N_SPOTS_SHIFT)
                 applied = True
-                puzzle.answer(bef_cat, num_cat, bef_ent, num_cat.entities[i - num], "X")
-                entities.append({"type": "spots_shift", "ents":((bef_cat.title, bef_ent), (aft_cat.title, aft_ent), (num_cat.title, num_cat.entities[i - num]))})
+                puzzle.answer_at(bef_cat, num_cat, bef_ent, i - num, "X")
+                entities.append({"type": "spots_shift", "ents":(_names(puzzle, bef_cat, bef_ent), _names(puzzle, aft_cat, aft_ent), _names(puzzle, num_cat, i - num))})
 
         if applied and slow:
             if return_entities: 
@@ -607,28 +814,28 @@ def apply_before(puzzle, terms, forbidden_insights=set(), slow=False, return_ent
 
             # For a position to be a valid answer, the corresponding position +/- num must be valid for the other entity
             for i in before_Xs:
-                sy = puzzle.get_symbol(
-                    aft_cat, num_cat, aft_ent, num_cat.entities[i + num]
+                sy = puzzle.symbol_at(
+                    aft_cat, num_cat, aft_ent, i + num
                 )
-                if sy == "*" and Insight.BEFORE_N_SPOTS_CROSSCHECK not in forbidden_insights:
+                if sy == "*" and not forbidden_insights & InsightBit.BEFORE_N_SPOTS_CROSSCHECK:
                     insights.add(Insight.BEFORE_N_SPOTS_CROSSCHECK)
                     applied = True
-                    puzzle.answer(
-                        aft_cat, num_cat, aft_ent, num_cat.entities[i + num], "X"
+                    puzzle.answer_at(
+                        aft_cat, num_cat, aft_ent, i + num, "X"
                     )
-                    entities.append({"type": "spots_cross", "ents":((aft_cat.title, aft_ent),(bef_cat.title, bef_ent), (num_cat.title, num_cat.entities[i + num]))})
+                    entities.append({"type": "spots_cross", "ents":(_names(puzzle, aft_cat, aft_ent),_names(puzzle, bef_cat, bef_ent), _names(puzzle, num_cat, i + num))})
 
             for i in after_Xs:
-                sy = puzzle.get_symbol(
-                    bef_cat, num_cat, bef_ent, num_cat.entities[i - num]
+                sy = puzzle.symbol_at(
+                    bef_cat, num_cat, bef_ent, i - num
                 )
-                if sy == "*" and Insight.BEFORE_N_SPOTS_CROSSCHECK not in forbidden_insights:
+                if sy == "*" and not forbidden_insights & InsightBit.BEFORE_N_SPOTS_CROSSCHECK:
                     insights.add(Insight.BEFORE_N_SPOTS_CROSSCHECK)
                     applied = True
-                    puzzle.answer(
-                        bef_cat, num_cat, bef_ent, num_cat.entities[i - num], "X"
+                    puzzle.answer_at(
+                        bef_cat, num_cat, bef_ent, i - num, "X"
                     )
-                    entities.append({"type": "spots_cross", "ents":((bef_cat.title, bef_ent),(aft_cat.title, aft_cat), (num_cat.title, num_cat.entities[i - num]))})
+                    entities.append({"type": "spots_cross", "ents":(_names(puzzle, bef_cat, bef_ent),_names(puzzle, aft_cat, aft_ent), _names(puzzle, num_cat, i - num))})
 
             if applied and slow:
                 if return_entities: 
@@ -642,9 +849,11 @@ def apply_before(puzzle, terms, forbidden_insights=set(), slow=False, return_ent
 def apply_simple_or(puzzle, terms, forbidden_insights=set(), slow=False, return_entities=False):
     """
     Apply the or rule to puzzle, will be incomplete if not enough information is known
+    terms: the compiled terms of the hint (see CompiledHints)
     slow: set to True to apply only the first valid insight
     return: applied, is_valid, complete
     """
+    forbidden_insights = insight_mask(forbidden_insights)
     applied = False
     is_valid = True
     complete = False
@@ -659,8 +868,8 @@ def apply_simple_or(puzzle, terms, forbidden_insights=set(), slow=False, return_
     ans_ent = terms[5]
     entities= [] 
 
-    pos_symb1 = puzzle.get_symbol(pos_cat1, ans_cat, pos_ent1, ans_ent)
-    pos_symb2 = puzzle.get_symbol(pos_cat2, ans_cat, pos_ent2, ans_ent)
+    pos_symb1 = puzzle.symbol_at(pos_cat1, ans_cat, pos_ent1, ans_ent)
+    pos_symb2 = puzzle.symbol_at(pos_cat2, ans_cat, pos_ent2, ans_ent)
 
     if pos_symb1 == "*" and pos_symb2 == "*":
         # we can't apply hint yet (don't have enough information)
@@ -672,12 +881,12 @@ def apply_simple_or(puzzle, terms, forbidden_insights=set(), slow=False, return_
         return applied, is_valid, complete, insights
     elif pos_symb1 == "O":
         # hint says that ent2 cannot be the answer ent
-        if pos_symb2 == "*" and Insight.APPLY_OR not in forbidden_insights:
+        if pos_symb2 == "*" and not forbidden_insights & InsightBit.APPLY_OR:
             # we can change game state
             applied = True
             complete = True
-            puzzle.answer(pos_cat2, ans_cat, pos_ent2, ans_ent, "X")
-            entities.append({"type":"or_false", "ents":((pos_cat2.title, pos_ent2), (pos_cat1.title, pos_ent1), (ans_cat.title, ans_ent))})
+            puzzle.answer_at(pos_cat2, ans_cat, pos_ent2, ans_ent, "X")
+            entities.append({"type":"or_false", "ents":(_names(puzzle, pos_cat2, pos_ent2), _names(puzzle, pos_cat1, pos_ent1), _names(puzzle, ans_cat, ans_ent))})
             insights.add(Insight.APPLY_OR)
             if return_entities: 
                 return applied, is_valid, complete, insights, entities 
@@ -687,14 +896,14 @@ def apply_simple_or(puzzle, terms, forbidden_insights=set(), slow=False, return_
             complete = True
     elif pos_symb1 == "X":
         # hint says that ent2 must be the answer ent
-        if pos_symb2 == "*" and Insight.APPLY_OR not in forbidden_insights:
+        if pos_symb2 == "*" and not forbidden_insights & InsightBit.APPLY_OR:
             # we can change the game state
             applied = True
             complete = True
-            puzzle.answer(pos_cat2, ans_cat, pos_ent2, ans_ent, "O")
-            is_valid = cross_out(puzzle, pos_cat2, ans_cat, pos_ent2, ans_ent)
+            puzzle.answer_at(pos_cat2, ans_cat, pos_ent2, ans_ent, "O")
+            is_valid = cross_out_at(puzzle, pos_cat2, ans_cat, pos_ent2, ans_ent)
             insights.add(Insight.APPLY_OR)
-            entities.append({"type":"or_true", "ents":((pos_cat2.title, pos_ent2), (pos_cat1.title, pos_ent1), (ans_cat.title, ans_ent))})
+            entities.append({"type":"or_true", "ents":(_names(puzzle, pos_cat2, pos_ent2), _names(puzzle, pos_cat1, pos_ent1), _names(puzzle, ans_cat, ans_ent))})
             if return_entities: 
                 return applied, is_valid, complete, insights, entities 
             return applied, is_valid, complete, insights
@@ -702,30 +911,30 @@ def apply_simple_or(puzzle, terms, forbidden_insights=set(), slow=False, return_
             # game state is correct, but we cannot change
             complete = True
     elif pos_symb1 == "*":
-        if pos_symb2 == "O" and Insight.APPLY_OR not in forbidden_insights:
+        if pos_symb2 == "O" and not forbidden_insights & InsightBit.APPLY_OR:
             # hint says ent1 is not ans_ent and we can change this
             applied = True
             complete = True
-            puzzle.answer(pos_cat1, ans_cat, pos_ent1, ans_ent, "X")
+            puzzle.answer_at(pos_cat1, ans_cat, pos_ent1, ans_ent, "X")
             insights.add(Insight.APPLY_OR)
-            entities.append({"type":"or_false", "ents":((pos_cat1.title, pos_ent1), (pos_cat2.title, pos_ent2), (ans_cat.title, ans_ent))})
+            entities.append({"type":"or_false", "ents":(_names(puzzle, pos_cat1, pos_ent1), _names(puzzle, pos_cat2, pos_ent2), _names(puzzle, ans_cat, ans_ent))})
             if return_entities: 
                 return applied, is_valid, complete, insights, entities 
             return applied, is_valid, complete, insights
-        elif pos_symb2 == "X" and Insight.APPLY_OR not in forbidden_insights:
+        elif pos_symb2 == "X" and not forbidden_insights & InsightBit.APPLY_OR:
             # hint says ent1 is ans_ent and we can change this
             applied = True
             complete = True
-            puzzle.answer(pos_cat1, ans_cat, pos_ent1, ans_ent, "O")
-            is_valid = cross_out(puzzle, pos_cat1, ans_cat, pos_ent1, ans_ent)
+            puzzle.answer_at(pos_cat1, ans_cat, pos_ent1, ans_ent, "O")
+            is_valid = cross_out_at(puzzle, pos_cat1, ans_cat, pos_ent1, ans_ent)
             insights.add(Insight.APPLY_OR)
-            entities.append({"type":"or_true", "ents":((pos_cat1.title, pos_ent1), (pos_cat2.title, pos_ent2), (ans_cat.title, ans_ent))})
+            entities.append({"type":"or_true", "ents":(_names(puzzle, pos_cat1, pos_ent1), _names(puzzle, pos_cat2, pos_ent2), _names(puzzle, ans_cat, ans_ent))})
             if return_entities: 
                 return applied, is_valid, complete, insights, entities 
             return applied, is_valid, complete, insights
 
     if pos_cat1 != pos_cat2:
-        if  Insight.SIMPLE_OR_DIFF_CAT not in forbidden_insights:
+        if  not forbidden_insights & InsightBit.SIMPLE_OR_DIFF_CAT:
             # A and B are in different categories
             # If A or B is C then A is not B
             applied, is_valid, _, _ = apply_not(
@@ -733,7 +942,7 @@ def apply_simple_or(puzzle, terms, forbidden_insights=set(), slow=False, return_
             )
             if applied:
                 insights.add(Insight.SIMPLE_OR_DIFF_CAT)
-                entities.append({"type":"or_diff", "ents":((pos_cat1.title, pos_ent1), (pos_cat2.title, pos_ent2), (ans_cat.title, ans_ent))})
+                entities.append({"type":"or_diff", "ents":(_names(puzzle, pos_cat1, pos_ent1), _names(puzzle, pos_cat2, pos_ent2), _names(puzzle, ans_cat, ans_ent))})
             if slow or not is_valid:
                 if return_entities: 
                     return applied, is_valid, complete, insights, entities 
@@ -741,20 +950,20 @@ def apply_simple_or(puzzle, terms, forbidden_insights=set(), slow=False, return_
     else:
         # A and B are in the same category
         # If A or B from category 0 is C then no other entity from category 0 is C
-        for ent in pos_cat1.entities:
+        for ent in range(puzzle.size(pos_cat1)):
             if ent not in [pos_ent1, pos_ent2]:
-                sy = puzzle.get_symbol(pos_cat1, ans_cat, ent, ans_ent)
+                sy = puzzle.symbol_at(pos_cat1, ans_cat, ent, ans_ent)
                 if sy == "O":
                     # Logical error.
                     is_valid = False
                     complete = True
                     return applied, is_valid, complete, insights
-                elif sy == "*" and Insight.SIMPLE_OR_SAME_CAT not in forbidden_insights:
+                elif sy == "*" and not forbidden_insights & InsightBit.SIMPLE_OR_SAME_CAT:
                     # No other entity from cat1 is ans_ent
                     insights.add(Insight.SIMPLE_OR_SAME_CAT)
                     applied = True
-                    puzzle.answer(pos_cat1, ans_cat, ent, ans_ent, "X")
-                    entities.append({"type":"or_same", "ents":((pos_cat1.title, ent), (ans_cat.title, ans_ent))})
+                    puzzle.answer_at(pos_cat1, ans_cat, ent, ans_ent, "X")
+                    entities.append({"type":"or_same", "ents":(_names(puzzle, pos_cat1, ent), _names(puzzle, ans_cat, ans_ent))})
             
                     
         if applied and slow:
@@ -768,8 +977,10 @@ def apply_simple_or(puzzle, terms, forbidden_insights=set(), slow=False, return_
 def apply_compound_or(puzzle, options, forbidden_insights = set(), return_entities=False):
     """
     Apply the compound or rule to puzzle, will be incomplete if not enough information is known
+    options: the compiled terms of both is hints (see CompiledHints)
     return: applied, is_valid, complete
     """
+    forbidden_insights = insight_mask(forbidden_insights)
     applied = False
     complete = False
     is_valid = True
@@ -783,14 +994,14 @@ def apply_compound_or(puzzle, options, forbidden_insights = set(), return_entiti
     entA1 = optionA[1]
     catA2 = optionA[2]
     entA2 = optionA[3]
-    currentA = puzzle.get_symbol(catA1, catA2, entA1, entA2)
+    currentA = puzzle.symbol_at(catA1, catA2, entA1, entA2)
 
     optionB = options[1]
     catB1 = optionB[0]
     entB1 = optionB[1]
     catB2 = optionB[2]
     entB2 = optionB[3]
-    currentB = puzzle.get_symbol(catB1, catB2, entB1, entB2)
+    currentB = puzzle.symbol_at(catB1, catB2, entB1, entB2)
 
     if currentA == currentB:
         if currentA != "*":
@@ -811,24 +1022,24 @@ def apply_compound_or(puzzle, options, forbidden_insights = set(), return_entiti
     # One is answered and the other is not; we are guaranteed to apply.
     applied = True
 
-    if currentA == "X" and Insight.APPLY_OR not in forbidden_insights:
-        puzzle.answer(catB1, catB2, entB1, entB2, "O")
+    if currentA == "X" and not forbidden_insights & InsightBit.APPLY_OR:
+        puzzle.answer_at(catB1, catB2, entB1, entB2, "O")
         insights.add(Insight.APPLY_OR)
-        is_valid = cross_out(puzzle, catB1, catB2, entB1, entB2)
-        entities.append({"type": "or_true", "ents": ((catB1.title, entB1), (catA1.title, entA1), (catB2.title, entB2))})
-    elif currentB == "X" and Insight.APPLY_OR not in forbidden_insights:
-        puzzle.answer(catA1, catA2, entA1, entA2, "O")
+        is_valid = cross_out_at(puzzle, catB1, catB2, entB1, entB2)
+        entities.append({"type": "or_true", "ents": (_names(puzzle, catB1, entB1), _names(puzzle, catA1, entA1), _names(puzzle, catB2, entB2))})
+    elif currentB == "X" and not forbidden_insights & InsightBit.APPLY_OR:
+        puzzle.answer_at(catA1, catA2, entA1, entA2, "O")
         insights.add(Insight.APPLY_OR)
-        entities.append({"type": "or_true", "ents": ((catA1.title, entA1), (catB1.title, entB1), (catA2.title, entA2))})
-        is_valid = cross_out(puzzle, catA1, catA2, entA1, entA2)
-    elif currentA == "O" and Insight.APPLY_OR not in forbidden_insights:
+        entities.append({"type": "or_true", "ents": (_names(puzzle, catA1, entA1), _names(puzzle, catB1, entB1), _names(puzzle, catA2, entA2))})
+        is_valid = cross_out_at(puzzle, catA1, catA2, entA1, entA2)
+    elif currentA == "O" and not forbidden_insights & InsightBit.APPLY_OR:
         insights.add(Insight.APPLY_OR)
-        entities.append({"type": "or_false", "ents": ((catB1.title, entB1), (catA1.title, entA1), (catB2.title, entB2))})
-        puzzle.answer(catB1, catB2, entB1, entB2, "X")
-    elif currentB == "O" and Insight.APPLY_OR not in forbidden_insights:
+        entities.append({"type": "or_false", "ents": (_names(puzzle, catB1, entB1), _names(puzzle, catA1, entA1), _names(puzzle, catB2, entB2))})
+        puzzle.answer_at(catB1, catB2, entB1, entB2, "X")
+    elif currentB == "O" and not forbidden_insights & InsightBit.APPLY_OR:
         insights.add(Insight.APPLY_OR)
-        puzzle.answer(catA1, catA2, entA1, entA2, "X")
-        entities.append({"type": "or_false", "ents": ((catA1.title, entA1), (catB1.title, entB1), (catA2.title, entA2))})
+        puzzle.answer_at(catA1, catA2, entA1, entA2, "X")
+        entities.append({"type": "or_false", "ents": (_names(puzzle, catA1, entA1), _names(puzzle, catB1, entB1), _names(puzzle, catA2, entA2))})
     if return_entities:
         return applied, is_valid, complete, insights, entities
     return applied, is_valid, complete, insights
@@ -837,7 +1048,10 @@ def apply_hint(puzzle, hint, forbidden_insights=set(), slow=False, return_entiti
     """
     Given a hint dictionary and a puzzle, apply next step of the hint to the puzzle
 
-    forbidden_insights: insights the solution can't use
+    hint: a hint dictionary or its compiled tuple from compile_hint
+
+    forbidden_insights: insights the solution can't use,
+      a set of Insights or an insight_mask
     slow: set to True to apply only the first insight for the hint
     return:
      applied  = whether the hint changed the state
@@ -846,6 +1060,7 @@ def apply_hint(puzzle, hint, forbidden_insights=set(), slow=False, return_entiti
      contradiction = the contradiction if the hint is invalid
      insights = the insights required for the move
     """
+    forbidden_insights = insight_mask(forbidden_insights)
 
     applied = False
     complete = False
@@ -853,24 +1068,22 @@ def apply_hint(puzzle, hint, forbidden_insights=set(), slow=False, return_entiti
     insights = set()
     entities = [] 
 
-    rule = list(hint.keys())[0]
-    terms = hint[rule]
-    if rule == "simple_hint":
-        rule = list(hint.keys())[0]
-    if rule == "is":
-        return apply_is(puzzle, terms, forbidden_insights=forbidden_insights, return_entities=return_entities)
-    elif rule == "not":
-        return apply_not(puzzle, terms[0]["is"], forbidden_insights=forbidden_insights, return_entities=return_entities)
-    elif rule == "before":
+    hint = compile_hint(puzzle, hint)
+    rule = hint[0]
+    if rule == CompiledHints.IS:
+        return apply_is(puzzle, hint[1:], forbidden_insights=forbidden_insights, return_entities=return_entities)
+    elif rule == CompiledHints.NOT:
+        return apply_not(puzzle, hint[1:], forbidden_insights=forbidden_insights, return_entities=return_entities)
+    elif rule == CompiledHints.BEFORE:
         return apply_before(
-            puzzle, terms, forbidden_insights=forbidden_insights, slow=slow, return_entities=return_entities
+            puzzle, hint[1:], forbidden_insights=forbidden_insights, slow=slow, return_entities=return_entities
         )
-    elif rule == "simple_or":
+    elif rule == CompiledHints.SIMPLE_OR:
         return apply_simple_or(
-            puzzle, terms, forbidden_insights=forbidden_insights, slow=slow, return_entities=return_entities
+            puzzle, hint[1:], forbidden_insights=forbidden_insights, slow=slow, return_entities=return_entities
         )
-    elif rule == "compound_or":
-        return apply_compound_or(puzzle, [terms[0]["is"], terms[1]["is"]], forbidden_insights=forbidden_insights, return_entities=return_entities)
+    elif rule == CompiledHints.COMPOUND_OR:
+        return apply_compound_or(puzzle, hint[1:], forbidden_insights=forbidden_insights, return_entities=return_entities)
     else:
         print(
             "This hint has no apply rules! Something has gone horribly wrong. The offending hint: "
@@ -879,29 +1092,205 @@ def apply_hint(puzzle, hint, forbidden_insights=set(), slow=False, return_entiti
 
     return applied, is_valid, complete, insights
 
-def apply_hints(puzzle, hints, forbidden_insights=set()):
+class SolverState:
+    """
+    The solver part way through its first pass over the hints
+
+    grid: the grids after the hints so far, packed (Puzzle.pack)
+    dirty, openings_forbidden: the rest of the puzzle's solver
+    state, dirty as (grid key, rows mask, columns mask)
+    applied, insights: as the solver has them so far,
+    insights as an insight_mask
+    backlog: the hints so far that are not complete
+    changed: the hints so far that changed the grids
+    """
+
+    __slots__ = (
+        "grid",
+        "dirty",
+        "openings_forbidden",
+        "applied",
+        "insights",
+        "backlog",
+        "changed",
+    )
+
+    def __init__(self, puzzle, applied, insights, backlog, changed):
+        self.grid = puzzle.pack()
+        self.dirty = tuple(
+            (key, _line_mask(rows), _line_mask(columns))
+            for key, (rows, columns) in puzzle.dirty.items()
+        )
+        self.openings_forbidden = puzzle.openings_forbidden
+        self.applied = applied
+        self.insights = insight_mask(insights)
+        self.backlog = tuple(backlog)
+        self.changed = tuple(changed)
+
+    def restore(self, puzzle):
+        """
+        return the puzzle as it was, in a copy of puzzle
+        """
+        copy = puzzle.unpack(self.grid)
+        copy.dirty = {}
+        copy.mark_dirty(
+            {key: (set(bits(rows)), set(bits(columns))) for key, rows, columns in self.dirty}
+        )
+        copy.openings_forbidden = self.openings_forbidden
+        return copy
+
+
+def _line_mask(lines):
+    mask = 0
+    for line in lines:
+        mask |= 1 << line
+    return mask
+
+
+def solve_hint(puzzle, hint, forbidden_insights=set(), profile=None):
+    """
+    apply a hint, then openings and transitives
+    for as long as the hint changed the puzzle
+    profile: a SolverProfile to time the rules with, or None
+    return: applied, is_valid, complete, insights
+    """
+    forbidden_insights = insight_mask(forbidden_insights)
+    if profile is not None:
+        start = profile.clock()
+    a, is_valid, complete, hint_insights = apply_hint(
+        puzzle, hint, forbidden_insights=forbidden_insights
+    )
+    if profile is not None:
+        profile.add(RULE_NAMES[hint[0]], a, profile.clock() - start)
+    if not is_valid:
+        return a, is_valid, complete, hint_insights
+
+    # Apply additional logic
+    if a:
+        a_2 = True
+        a_3 = True
+        while a_2 or a_3:
+            # Apply openings and transitives as many times as you can.
+            if profile is not None:
+                start = profile.clock()
+            a_2, is_valid, _, opening_insights = find_openings(
+                puzzle, forbidden_insights=forbidden_insights
+            )
+            if profile is not None:
+                profile.add("find_openings", a_2, profile.clock() - start)
+            if not is_valid:
+                return a, is_valid, complete, hint_insights
+            if profile is not None:
+                start = profile.clock()
+            a_3, is_valid, _, trans_insights = find_transitives(
+                puzzle, forbidden_insights=forbidden_insights
+            )
+            if profile is not None:
+                profile.add("find_transitives", a_3, profile.clock() - start)
+            if not is_valid:
+                return a, is_valid, complete, hint_insights
+            hint_insights = hint_insights | trans_insights | opening_insights
+    return a, is_valid, complete, hint_insights
+
+def apply_hints(puzzle, hints, forbidden_insights=set(), checkpoints=None):
     """
     solver
+
+    forbidden_insights is turned into an insight_mask once here,
+    so the rules test bits instead of hashing Insights
+
+    checkpoints: a list to record the first pass in, entry k is the
+    SolverState after the first k hints. If it already holds
+    entries for a prefix of hints, the solver resumes from the last
+    one instead of starting blank. The first pass takes the hints
+    in order, so a resumed solve matches a solve from scratch.
+    With a state trie on puzzle (use_state_trie) the solver also
+    resumes from, and records its first pass in, the trie.
     """
+    forbidden_insights = insight_mask(forbidden_insights)
+    profile = puzzle.profile
+    if profile is None:
+        return _solve(puzzle, hints, forbidden_insights, checkpoints, None)
+
+    start = profile.clock()
+    result = _solve(puzzle, hints, forbidden_insights, checkpoints, profile)
+    profile.add_solve(result[2], result[3], profile.clock() - start)
+    return result
+
+def _solve(puzzle, hints, forbidden_insights, checkpoints, profile):
     is_valid = True
-    copy = Puzzle(puzzle.categories)
-    queue = hints[:]
-    # trace = {}
-    backlog = []
-    applied = True
-    insights = set()
+    queue = compile_hints(puzzle, hints)
+    nogoods = puzzle.nogoods
     loop = 0
-    if len(hints) == 0:
+    if len(queue) == 0:
         is_valid = False
-        return copy, is_valid, loop, insights
+        return puzzle.blank(), is_valid, loop, set()
+
+    trie = puzzle.state_trie
+    if trie is not None:
+        if checkpoints is None:
+            checkpoints = []
+        # resume after the longer of the trie path and the
+        # checkpoints, and share whatever the trie lacks
+        path = trie.path(puzzle, queue, forbidden_insights)
+        if len(path) > len(checkpoints):
+            checkpoints[:] = [node.state for node in path]
+        node = path[-1]
+        for k in range(len(path), len(checkpoints)):
+            node = trie.child(node, queue[k - 1], checkpoints[k])
+
+    if checkpoints:
+        start = checkpoints[-1]
+        done = len(checkpoints) - 1
+        copy = start.restore(puzzle)
+        applied = start.applied
+        insights = insights_of(start.insights)
+        backlog = list(start.backlog)
+        changed = list(start.changed)
+    else:
+        done = 0
+        copy = puzzle.blank()
+        applied = False
+        insights = set()
+        backlog = []
+        changed = []
+        if checkpoints is not None:
+            checkpoints.append(SolverState(copy, applied, insights, backlog, changed))
+
+    # The first pass, from wherever the checkpoints left off
+    loop = 1
+    for hint in queue[done:]:
+        a, is_valid, complete, hint_insights = solve_hint(
+            copy, hint, forbidden_insights, profile
+        )
+        applied = applied or a
+        insights = insights | hint_insights
+        if not complete:
+            backlog.append(hint)
+        if not is_valid:
+            # the first pass gets to the same grids without the
+            # hints that changed nothing, so the rest contradict
+            if nogoods is not None:
+                nogoods.add(changed + [hint], hint, forbidden_insights)
+            return copy, is_valid, loop, insights
+        if a:
+            changed.append(hint)
+        if checkpoints is not None:
+            state = SolverState(copy, applied, insights, backlog, changed)
+            checkpoints.append(state)
+            if trie is not None:
+                node = trie.child(node, hint, state)
+    all_hints = queue
+    queue = backlog
+    backlog = []
+
     while is_valid and applied and len(queue) > 0:
         applied = False
         loop += 1
 
         for hint in queue:
-            og = deepcopy(copy)
-            a, is_valid, complete, hint_insights = apply_hint(
-                copy, hint, forbidden_insights=forbidden_insights
+            a, is_valid, complete, hint_insights = solve_hint(
+                copy, hint, forbidden_insights, profile
             )
             applied = applied or a
             insights = insights | hint_insights
@@ -909,35 +1298,26 @@ def apply_hints(puzzle, hints, forbidden_insights=set()):
                 backlog.append(hint)
 
             if not is_valid:
+                if nogoods is not None:
+                    nogoods.add(all_hints, hint, forbidden_insights)
                 return copy, is_valid, loop, insights
-
-            # Apply additional logic
-            if a:
-                a_2 = True
-                a_3 = True
-                while a_2 or a_3:
-                    # Apply openings and transitives as many times as you can.
-                    a_2, is_valid, complete, opening_insights = find_openings(
-                        copy, forbidden_insights=forbidden_insights
-                    )
-                    if not is_valid:
-                        return copy, is_valid, loop, insights
-                    a_3, is_valid, complete, trans_insights = find_transitives(
-                        copy, forbidden_insights=forbidden_insights
-                    )
-                    if not is_valid:
-                        return copy, is_valid, loop, insights
-                    applied = applied or a_2 or a_3  # test if anything was changed
-                    hint_insights = hint_insights | trans_insights | opening_insights
-                    insights = insights | hint_insights
-                if not is_valid:
-                    return copy, is_valid, loop, insights
         queue = backlog
         backlog = []
 
     return copy, is_valid, loop, insights
 
 
+# what the use_ methods of a Puzzle set, left out when it is pickled
+SOLVER_OPTIONS = (
+    "solver_cache",
+    "profile",
+    "nogoods",
+    "state_trie",
+    "pair_screen",
+    "hint_pool",
+)
+
+
 class Puzzle:
     def __init__(self, categories):
         """
@@ -956,11 +1336,23 @@ class Puzzle:
         for the xth entitity in cat2 and the yth entity in cat1.
         """
         self.categories = categories
+        self.trail = None
+        self._snapshots = 0
+        self.openings_forbidden = None
+        self.transitives = None
+        self.frozen = False
+        self.solver_cache = None
+        self.profile = None
+        self.nogoods = None
+        self.state_trie = None
+        self.pair_screen = None
+        self.hint_pool = None
         self.left_right = self.categories[0 : len(categories) - 1]
         self.top_bottom = []
         for i in range(len(self.categories) - 1, 0, -1):
             self.top_bottom.append(self.categories[i])
-        self.grids = {}
+        layout = []
+        grid_cats = []
 
         rows = len(self.top_bottom)
 
@@ -968,13 +1360,219 @@ class Puzzle:
             for i in range(rows):
                 left_cat = self.top_bottom[i]
                 title = self._to_key(top_category, left_cat)
-                array = []
-                for i in range(len(left_cat.entities)):
-                    array += [["*"] * len(top_category.entities)]
-                self.grids[title] = array
+                layout.append((title, len(left_cat.entities), len(top_category.entities)))
+                grid_cats.append((title, top_category, left_cat))
 
             rows -= 1
 
+        self.lookup = get_lookup(categories, grid_cats)
+        self._build_grids(layout)
+        self.mark_all_dirty()
+
+    def _build_grids(self, layout):
+        """
+        create a blank grid for every (key, rows, columns)
+        in the layout, each grid is a nested list of symbols
+        """
+        self.grids = {}
+        for title, rows, columns in layout:
+            array = []
+            for i in range(rows):
+                array += [["*"] * columns]
+            self.grids[title] = array
+
+    def blank(self):
+        """
+        return a blank puzzle with the same
+        categories and grid backend
+        """
+        return self.__class__(self.categories)
+
+    def clone(self):
+        """
+        return an independent copy of the puzzle,
+        copies the grid cells without walking any
+        other objects
+        """
+        copy = self._shallow_copy()
+        copy._copy_grids(self)
+        return copy
+
+    def _shallow_copy(self):
+        """
+        return a copy of the puzzle that still
+        needs grids of its own
+        """
+        copy = self.__class__.__new__(self.__class__)
+        copy.__dict__.update(self.__dict__)
+        copy.trail = None
+        copy._snapshots = 0
+        copy.transitives = None
+        copy.frozen = False
+        copy.dirty = {}
+        copy.mark_dirty(self.dirty)
+        return copy
+
+    def __getstate__(self):
+        """
+        pickle the puzzle without the solver options
+        (SOLVER_OPTIONS), which belong to the space solving
+        in it: every solved puzzle and every individual holds
+        the puzzle, so they would take the whole solver cache
+        along. An unpickled puzzle has none of the options
+        """
+        state = self.__dict__.copy()
+        for name in SOLVER_OPTIONS:
+            state[name] = None
+        return state
+
+    def _copy_grids(self, other):
+        self.grids = {
+            key: [list(row) for row in grid] for key, grid in other.grids.items()
+        }
+
+    def freeze(self):
+        """
+        make the grids read only, answering a
+        frozen puzzle raises an exception
+
+        clone a frozen puzzle to get a writable copy
+        """
+        self.frozen = True
+        self.grids = {
+            key: [tuple(row) for row in grid] for key, grid in self.grids.items()
+        }
+
+    def nbytes(self):
+        """
+        return the memory held by the grids
+        """
+        return sum(
+            sys.getsizeof(grid) + sum(sys.getsizeof(row) for row in grid)
+            for grid in self.grids.values()
+        )
+
+    def pack(self):
+        """
+        return the grids as bytes, 2 bits per cell
+        (0 "*", 1 "X", 2 "O"), four cells to a byte
+        in grid then row order
+        """
+        packed = bytearray((self.num_cells() + 3) // 4)
+        i = 0
+        for grid in self.grids.values():
+            for row in grid:
+                for symbol in row:
+                    packed[i >> 2] |= PACKED_CODES[symbol] << ((i & 3) << 1)
+                    i += 1
+        return bytes(packed)
+
+    def unpack(self, packed):
+        """
+        return a puzzle over the same categories
+        with the grids from pack
+        """
+        copy = self._shallow_copy()
+        copy._copy_grids(self)
+        copy.load(packed)
+        return copy
+
+    def load(self, packed):
+        """
+        overwrite the grids with the grids from pack
+        """
+        i = 0
+        for grid in self.grids.values():
+            for row in grid:
+                for j in range(len(row)):
+                    row[j] = PACKED_SYMBOLS[(packed[i >> 2] >> ((i & 3) << 1)) & 3]
+                    i += 1
+        self.transitives = None
+
+    def num_cells(self):
+        return sum(len(grid) * len(grid[0]) for grid in self.grids.values())
+
+    def snapshot(self):
+        """
+        start recording answers and return a mark
+        that rollback can return the grids to
+
+        every snapshot must be released
+        """
+        if self.trail is None:
+            self.trail = []
+        self._snapshots += 1
+        return len(self.trail)
+
+    def rollback(self, mark):
+        """
+        undo every answer made since mark
+        """
+        while len(self.trail) > mark:
+            key, row, column, symbol = self.trail.pop()
+            self._set(key, row, column, symbol)
+        # union-find can't split classes; rebuild when next needed
+        self.transitives = None
+
+    def release(self):
+        """
+        stop recording answers once the
+        last snapshot is released
+        """
+        self._snapshots -= 1
+        if self._snapshots == 0:
+            self.trail = None
+
+    def _write(self, key, row, column, symbol):
+        if self.frozen:
+            raise Exception("Can't answer a frozen puzzle, clone it first")
+        if self.trail is not None:
+            self.trail.append((key, row, column, self.grids[key][row][column]))
+        self._set(key, row, column, symbol)
+
+    def _set(self, key, row, column, symbol):
+        self.grids[key][row][column] = symbol
+        lines = self.dirty.get(key)
+        if lines is None:
+            lines = self.dirty[key] = (set(), set())
+        lines[0].add(row)
+        lines[1].add(column)
+
+    def mark_dirty(self, lines):
+        """
+        add {grid key: (rows, columns)} to the
+        lines written since the last openings pass
+        """
+        for key, (rows, columns) in lines.items():
+            if key not in self.dirty:
+                self.dirty[key] = (set(), set())
+            self.dirty[key][0].update(rows)
+            self.dirty[key][1].update(columns)
+
+    def mark_all_dirty(self):
+        self.dirty = {
+            key: (set(range(len(grid))), set(range(len(grid[0]))))
+            for key, grid in self.grids.items()
+        }
+
+    def transitive_index(self):
+        """
+        return the union-find classes of the puzzle,
+        kept up to date as cells are answered
+        """
+        if self.transitives is None:
+            self.transitives = TransitiveIndex(self)
+        return self.transitives
+
+    def take_dirty(self):
+        """
+        return the lines written since the last
+        openings pass and start a new record
+        """
+        dirty = self.dirty
+        self.dirty = {}
+        return dirty
+
     def get_category(self, entity):
         """
         return a category where entity
@@ -990,8 +1588,9 @@ class Puzzle:
         Get the grid for cat1 and cat2
         assuming cat1 is the top category
         """
-        if self._to_key(cat1, cat2) in self.grids:
-            return self.grids[self._to_key(cat1, cat2)]
+        pair = self.lookup.pairs.get((cat1, cat2))
+        if pair is not None and not pair[1]:
+            return self.grids[pair[0]]
         else:
             return None
         
@@ -1027,15 +1626,55 @@ class Puzzle:
         This works regardless of the order of cat1 and cat2
         ex: you don't need to put the top category first
         """
-        index1 = cat1.entities.index(ent1)
-        index2 = cat2.entities.index(ent2)
-        if self._to_key(cat1, cat2) in self.grids:
-            grid = self.grids[self._to_key(cat1, cat2)]
-            grid[index2][index1] = new_symbol
+        self.answer_at(
+            self.lookup.category_index[cat1],
+            self.lookup.category_index[cat2],
+            self.lookup.entity_index[cat1][ent1],
+            self.lookup.entity_index[cat2][ent2],
+            new_symbol,
+        )
 
-        elif self._to_key(cat2, cat1) in self.grids:
-            grid = self.grids[self._to_key(cat2, cat1)]
-            grid[index1][index2] = new_symbol
+    def answer_at(self, cat1, cat2, ent1, ent2, new_symbol):
+        """
+        answer with categories and entities given by index
+        """
+        pair = self.lookup.index_pairs[cat1][cat2]
+        if pair is not None:
+            key, transposed = pair
+            if transposed:
+                self._write(key, ent1, ent2, self._encode(new_symbol))
+            else:
+                self._write(key, ent2, ent1, self._encode(new_symbol))
+
+        if self.transitives is not None:
+            offsets = self.lookup.offsets
+            self.transitives.answered_at(
+                offsets[cat1] + ent1, offsets[cat2] + ent2, new_symbol
+            )
+
+    def symbol_at(self, cat1, cat2, ent1, ent2):
+        """
+        get_symbol with categories and entities given by index
+        """
+        pair = self.lookup.index_pairs[cat1][cat2]
+        if pair is not None:
+            key, transposed = pair
+            if transposed:
+                return self.grids[key][ent1][ent2]
+            return self.grids[key][ent2][ent1]
+
+    def size(self, cat):
+        """
+        return the number of entities in
+        the category at index cat
+        """
+        return len(self.categories[cat].entities)
+
+    def _encode(self, symbol):
+        """
+        return how a symbol is stored in the grids
+        """
+        return symbol
 
     def _print_row(self, top_cats, cat2, remove_top=False):
         """
@@ -1062,7 +1701,7 @@ class Puzzle:
             left_ent = self.trim_ent(cat2.entities[i]) + "| "
             return_str += left_ent
             for cat in top_cats:
-                row = self.grids[cat.title + ":" + cat2.title][i]
+                row = self._symbols(self.grids[cat.title + ":" + cat2.title][i])
                 row_str = " " + "    ".join(row) + "  |"
                 return_str += row_str
             return_str += "\n"
@@ -1092,7 +1731,7 @@ class Puzzle:
             left_ent = "|"
             return_str += left_ent
             for cat in top_cats:
-                row = self.grids[cat.title + ":" + cat2.title][i]
+                row = self._symbols(self.grids[cat.title + ":" + cat2.title][i])
                 row_str = "".join(row) + "|"
                 return_str += row_str
             return_str += "\n"
@@ -1132,6 +1771,37 @@ class Puzzle:
 
         return return_str
 
+    def _symbols(self, line):
+        """
+        return a row or column of a grid
+        as a list of "*", "X" and "O" symbols
+        """
+        return list(line)
+
+    def line_counts(self, grid, axis, lines=None):
+        """
+        summarise rows (axis=1) or columns (axis=0)
+        of a grid as (blanks, os, first blank, first O)
+        where a missing symbol has index -1
+
+        lines: which rows or columns, all of them if None
+        """
+        if lines is None:
+            lines = range(len(grid) if axis == 1 else len(grid[0]))
+
+        counts = []
+        for i in lines:
+            if axis == 1:
+                line = grid[i]
+            else:
+                line = [row[i] for row in grid]
+            blanks = line.count("*")
+            os = line.count("O")
+            blank_at = line.index("*") if blanks > 0 else -1
+            o_at = line.index("O") if os > 0 else -1
+            counts.append((blanks, os, blank_at, o_at))
+        return counts
+
     def grid_is_valid(self, grid):
         """
         Check that there are one or less "O"s
@@ -1179,12 +1849,9 @@ class Puzzle:
         Return true if there is at most 1 "O"
         in each row and column
         """
-        if self._to_key(cat1, cat2) in self.grids:
-            grid = self.grids[self._to_key(cat1, cat2)]
-        elif self._to_key(cat2, cat1) in self.grids:
-            grid = self.grids[self._to_key(cat2, cat1)]
+        grid = self.grids[self.lookup.pairs[cat1, cat2][0]]
 
-        return self._grid_is_valid(grid)
+        return self.grid_is_valid(grid)
 
     def find_truths(self, category, ent):
         """
@@ -1195,17 +1862,16 @@ class Puzzle:
         connected to
         """
         truths = {}
-        index = category.entities.index(ent)
+        index = self.lookup.entity_index[category][ent]
 
         for cat2 in self.categories:
             if cat2 != category:
-                if self._to_key(category, cat2) in self.grids:
-                    grid = self.grids[self._to_key(category, cat2)]
-                    answers = [grid[i][index] for i in range(len(grid))]
-
-                elif self._to_key(cat2, category) in self.grids:
-                    grid = self.grids[self._to_key(cat2, category)]
-                    answers = grid[index]
+                key, transposed = self.lookup.pairs[category, cat2]
+                grid = self.grids[key]
+                if not transposed:
+                    answers = self._symbols([grid[i][index] for i in range(len(grid))])
+                else:
+                    answers = self._symbols(grid[index])
 
                 if "O" in answers:
                     truths[cat2.title] = cat2.entities[answers.index("O")]
@@ -1223,7 +1889,7 @@ class Puzzle:
         }
         """
         relations = {}
-        index = category.entities.index(ent)
+        index = self.lookup.entity_index[category][ent]
 
         for cat2 in self.categories:
             relations[cat2] = {
@@ -1232,13 +1898,14 @@ class Puzzle:
                 "nil": [],
             }
             if cat2 != category:
-                if self._to_key(category, cat2) in self.grids:
-                    grid = self.grids[self._to_key(category, cat2)]
-                    answers = [grid[i][index] for i in range(len(grid))]
-
-                elif self._to_key(cat2, category) in self.grids:
-                    grid = self.grids[self._to_key(cat2, category)]
-                    answers = grid[index]
+                pair = self.lookup.pairs.get((category, cat2))
+                if pair is not None and not pair[1]:
+                    grid = self.grids[pair[0]]
+                    answers = self._symbols([grid[i][index] for i in range(len(grid))])
+
+                elif pair is not None:
+                    grid = self.grids[pair[0]]
+                    answers = self._symbols(grid[index])
                 else:
                     print("SOMETHING HAS GONE HORRIBLY WRONG")
                     print(type(category))
@@ -1265,23 +1932,20 @@ class Puzzle:
         """
         return the symbol at ent1 and ent2
         """
-        index1 = cat1.entities.index(ent1)
-        index2 = cat2.entities.index(ent2)
-        if self._to_key(cat1, cat2) in self.grids:
-            grid = self.grids[self._to_key(cat1, cat2)]
-            return grid[index2][index1]
-
-        elif self._to_key(cat2, cat1) in self.grids:
-            grid = self.grids[self._to_key(cat2, cat1)]
-            return grid[index1][index2]
+        pair = self.lookup.pairs.get((cat1, cat2))
+        if pair is not None:
+            key, transposed = pair
+            index1 = self.lookup.entity_index[cat1][ent1]
+            index2 = self.lookup.entity_index[cat2][ent2]
+            if transposed:
+                return self.grids[key][index1][index2]
+            return self.grids[key][index2][index1]
 
     def get_category(self, title):
         """
         get category object from title
         """
-        titles = [cat.title for cat in self.categories]
-
-        return self.categories[titles.index(title)]
+        return self.lookup.titles[title]
 
     def _all_ents(self):
         """
@@ -1296,37 +1960,95 @@ class Puzzle:
 
         return ents
 
-    def num_violations(self):
+    def truth_table(self):
+        """
+        return truths[id][c], the index in category c of the
+        first "O" of the entity with lookup id, or -1 if there
+        is none (and for the entity's own category)
+        """
+        return self.scan_grids()[0]
+
+    def scan_grids(self):
+        """
+        read every grid once, row by row and column by column
+
+        return: truths, valid, complete
+         truths   = the truth_table
+         valid    = bitmask of the grids that pass grid_is_valid,
+                    bit k for the k-th key of get_grid_keys
+         complete = bitmask of the grids that pass grid_is_complete
+        """
+        lookup = self.lookup
+        truths = [[-1] * len(self.categories) for _ in lookup.entities]
+        grid_bits = {key: 1 << k for k, key in enumerate(self.grids)}
+        valid = 0
+        complete = 0
+        for (top_cat, left_cat), (key, transposed) in lookup.pairs.items():
+            if transposed:
+                continue
+            rows, mark = self._plain_grid(self.grids[key])
+            top = lookup.category_index[top_cat]
+            left = lookup.category_index[left_cat]
+            most = 0
+            least = len(rows[0])
+            offset = lookup.offsets[left]
+            for i, row in enumerate(rows):
+                os = row.count(mark)
+                most = max(most, os)
+                least = min(least, os)
+                if os:
+                    truths[offset + i][top] = row.index(mark)
+            offset = lookup.offsets[top]
+            for j, column in enumerate(zip(*rows)):
+                os = column.count(mark)
+                most = max(most, os)
+                least = min(least, os)
+                if os:
+                    truths[offset + j][left] = column.index(mark)
+            if most <= 1:
+                valid |= grid_bits[key]
+                if least == 1:
+                    complete |= grid_bits[key]
+        return truths, valid, complete
+
+    def _plain_grid(self, grid):
+        """
+        return a grid as nested lists and
+        the value an "O" is stored as
+        """
+        return grid, "O"
+
+    def num_violations(self, truths=None):
         """
         Return the number of truth violations
         in the puzzle
+
+        truths: the truth_table if it is already built
+
+        For each entity A and each pair of entities B and C
+        it is linked to by the first "O" in their categories:
+        one violation if B and C are crossed out, one if B's
+        first "O" in C's category is not C and one if C's first
+        "O" in B's category is not B
         """
+        if truths is None:
+            truths = self.truth_table()
+        offsets = self.lookup.offsets
         violations = 0
-        count = 0
-        for cat, ent in self._all_ents():
-            truths = self.find_truths(cat, ent)
-            if len(truths) >= 2:
-                pairs = list(combinations(truths.keys(), 2))
-                count += len(pairs)
-                for first, second in pairs:
-
-                    # if these two entites are in the truth of ent
-                    # then they should also be true
-                    cat1 = self.get_category(first)
-                    cat2 = self.get_category(second)
-                    ent1 = truths[first]
-                    ent2 = truths[second]
-
+        for row in truths:
+            linked = [(c, ent) for c, ent in enumerate(row) if ent >= 0]
+            for n, (cat1, ent1) in enumerate(linked):
+                truths1 = truths[offsets[cat1] + ent1]
+                for cat2, ent2 in linked[n + 1 :]:
                     # The symbol should be "O" or empty ("*")
-                    if self.get_symbol(cat1, cat2, ent1, ent2) == "X":
+                    if self.symbol_at(cat1, cat2, ent1, ent2) == "X":
                         violations += 1
 
                     # make sure there is not a truth somewhere else
-                    truths1 = self.find_truths(cat1, ent1)
-                    if cat2.title in truths1 and truths1[cat2.title] != ent2:
+                    if truths1[cat2] >= 0 and truths1[cat2] != ent2:
                         violations += 1
-                    truths2 = self.find_truths(cat2, ent2)
-                    if cat1.title in truths2 and truths2[cat1.title] != ent1:
+                    truth2 = truths[offsets[cat2] + ent2][cat1]
+                    if truth2 >= 0 and truth2 != ent1:
                         violations += 1
         return violations
 
@@ -1334,35 +2056,8 @@ class Puzzle:
         """
         Make sure there is not violations in
         truths of each entity
-
-        There is absoluely a more efficent way to do this
         """
-        for cat, ent in self._all_ents():
-            truths = self.find_truths(cat, ent)
-            if len(truths) >= 2:
-                pairs = combinations(truths.keys(), 2)
-                for first, second in pairs:
-
-                    # if these two entites are in the truth of ent
-                    # then they should also be true
-                    cat1 = self.get_category(first)
-                    cat2 = self.get_category(second)
-                    ent1 = truths[first]
-                    ent2 = truths[second]
-
-                    # The symbol should be "O" or empty ("*")
-                    if self.get_symbol(cat1, cat2, ent1, ent2) == "X":
-                        return False
-
-                    # make sure there is not a truth somehwere else
-                    truths1 = self.find_truths(cat1, ent1)
-                    if cat2.title in truths1 and truths1[cat2.title] != ent2:
-                        return False
-
-                    truths2 = self.find_truths(cat2, ent2)
-                    if cat1.title in truths2 and truths2[cat1.title] != ent1:
-                        return False
-        return True
+        return self.num_violations() == 0
 
     def is_valid(self):
         """
@@ -1374,7 +2069,7 @@ class Puzzle:
         # make sure there is at most 1 truth
         # in each row and column
         for grid in self.grids.values():
-            if not self._grid_is_valid(grid):
+            if not self.grid_is_valid(grid):
                 return False
 
         # make sure truths have no violations
@@ -1389,7 +2084,7 @@ class Puzzle:
         """
         if self.is_valid():
             for grid in self.grids.values():
-                if not self._grid_is_complete(grid):
+                if not self.grid_is_complete(grid):
                     return False
 
             return True
@@ -1422,13 +2117,123 @@ class Puzzle:
             grid_len += 1
         return grid_sums / grid_len, valid_sums / grid_len
 
-    def apply_hints(self, hints, forbidden_insights = set()):
+    def apply_hints(self, hints, forbidden_insights = set(), checkpoints = None):
         """
         Return a copy of the puzzle
         here all hints in a list are
         applied
         Starts with a blank verison
         of the puzzle (i.e. does not copy grids)
+
+        checkpoints: see apply_hints, left as it is
+        when the result comes from the solver cache
+
+        With a solver cache the result is shared between
+        calls: the puzzle is frozen and the insights a frozenset
+
+        With nogoods or a pair screen, hints holding a known
+        nogood or an incompatible pair are not solved, see rejected
         """
-        return apply_hints(self, hints, forbidden_insights)
+        compiled = compile_hints(self, hints)
+        if self.solver_cache is None:
+            result = self.rejected(compiled, forbidden_insights)
+            if result is None:
+                result = apply_hints(self, compiled, forbidden_insights, checkpoints)
+            return result
+
+        key = solver_key(compiled, forbidden_insights)
+        result = self.solver_cache.get(key)
+        if result is None:
+            result = self.rejected(compiled, forbidden_insights)
+        if result is None:
+            result = self.solver_cache.put(
+                key, apply_hints(self, compiled, forbidden_insights, checkpoints)
+            )
+        return result
 
+    def rejected(self, compiled, forbidden_insights = set()):
+        """
+        Return the apply_hints result for compiled hints
+        that hold a known nogood or an incompatible pair, a
+        blank puzzle that is not valid after one loop, or
+        None if they hold neither
+
+        The pair screen forces cells with every rule, so it
+        is only asked when no insight is forbidden
+        """
+        if (
+            self.pair_screen is not None
+            and insight_mask(forbidden_insights) == 0
+            and not self.pair_screen.compatible(compiled)
+        ):
+            return self.blank(), False, 1, set()
+        if self.nogoods is not None and self.nogoods.contains(compiled, forbidden_insights):
+            return self.blank(), False, 1, set()
+        return None
+
+    def use_solver_cache(self, max_entries=10000, max_bytes=64 * 1024 * 1024):
+        """
+        cache the results of apply_hints on this puzzle,
+        see SolverCache for the budgets, max_entries 0
+        removes the cache
+        """
+        self.solver_cache = None
+        if max_entries != 0:
+            self.solver_cache = SolverCache(max_entries, max_bytes)
+        return self.solver_cache
+
+    def use_nogoods(self, max_entries=10000, max_size=6):
+        """
+        remember the hint sets found contradictory and
+        report hint lists holding one as contradictory
+        without solving them, see NogoodStore and rejected
+        for the result they get, max_entries 0 removes
+        the store
+        """
+        self.nogoods = None
+        if max_entries != 0:
+            self.nogoods = NogoodStore(max_entries, max_size)
+        return self.nogoods
+
+    def use_pair_screen(self, compatibility):
+        """
+        report hint lists holding a pair of incompatible
+        hints as contradictory without solving them,
+        compatibility is a HintCompatibility, None
+        removes the screen
+        """
+        self.pair_screen = compatibility
+        return self.pair_screen
+
+    def use_hint_pool(self, pool):
+        """
+        draw the hints added to individuals of this
+        puzzle from pool, see HintGrammar.draw_hint
+        """
+        self.hint_pool = pool
+        return self.hint_pool
+
+    def use_state_trie(self, max_nodes=20000):
+        """
+        resume every apply_hints on this puzzle after the
+        longest prefix of its hints solved before, see StateTrie,
+        max_nodes 0 removes the trie
+        """
+        self.state_trie = None
+        if max_nodes != 0:
+            self.state_trie = StateTrie(max_nodes)
+        return self.state_trie
+
+    def blank_state(self):
+        """
+        return the SolverState before any hint
+        """
+        return SolverState(self.blank(), False, set(), [], [])
+
+    def use_profile(self, profile=True):
+        """
+        time the rules of every apply_hints on this puzzle,
+        see SolverProfile, profile False stops the timing
+        """
+        self.profile = SolverProfile() if profile else None
+        return self.profile
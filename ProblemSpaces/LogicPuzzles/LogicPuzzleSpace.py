@@ -9,8 +9,10 @@ sys.path.append(str(Path.cwd().parent))
 sys.path.append(str(Path.cwd())) 
 from ProblemSpaceInterface import ProblemSpace, Constraint
 from LogicPuzzle import Puzzle, Category
-from HintGrammar import HintSet, generate_hint
-from Constraints import get_constant_constraints, random_constraint, constraint_in_ind, is_contradictory
+from HintGrammar import HintSet, HintPool
+from HintCompatibility import get_compatibility
+from GuidedHints import GuidedHintPool
+from Constraints import get_constant_constraints, check_constant_constraints, random_constraint, constraint_in_ind, is_contradictory, ContradictionChecker
 import random 
 
 order = Category("order", ["1st", "2nd", "3rd", "4th"], True)
@@ -23,10 +25,62 @@ SOUP_PUZZLE = Puzzle([order, method, ingredient])
 
 
 class LogicPuzzleSpace (ProblemSpace):
-    def __init__(self, basePuzzle = None): 
+    def __init__(self, basePuzzle = None, cache_entries = 10000, cache_bytes = 64 * 1024 * 1024, profile = False, nogood_entries = 0, trie_nodes = 0, pair_screen = False, target_solution = False): 
+        """
+        basePuzzle: the puzzle to make hints for, SOUP_PUZZLE if
+        None. The space solves in a blank puzzle of its own with
+        the same categories, so the options below only hold for
+        this space
+        cache_entries, cache_bytes: budget of the solver cache
+        shared by every individual, set cache_entries to 0 to
+        solve every individual from scratch
+        nogood_entries: most contradictory hint sets to remember,
+        individuals holding one are not valid without a solve and
+        keep a blank puzzle after one loop (see NogoodStore and
+        Puzzle.rejected) instead of where the solver stopped, which
+        changes their constant constraint scores and bins, so 0
+        (solve them all) by default
+        trie_nodes: most solver states to keep in the prefix trie
+        every solve resumes from (see StateTrie), 0 (no trie) by
+        default, it saves about a tenth of the solve time of a
+        run and holds its states for the whole run
+        pair_screen: set to True to find individuals holding two
+        incompatible hints not valid without a solve (see
+        HintCompatibility), they keep a blank puzzle like nogoods
+        target_solution: set to True to fix a hidden solution
+        for the run and draw only hints true in it (see
+        GuidedHintPool), so no hint list is contradictory
+        and every random constraint can be satisfied. A solution
+        pairs off the entities of every category, so this needs
+        categories with as many entities each, ValueError otherwise
+        profile: set to True to time the solver rules,
+        see solver_profile
+        """
         if basePuzzle is None:
             basePuzzle = SOUP_PUZZLE
-        self.basePuzzle = basePuzzle 
+        if target_solution and len(set(len(cat.entities) for cat in basePuzzle.categories)) != 1:
+            raise ValueError(
+                "target_solution needs categories with as many entities each, got "
+                + ", ".join("{} ({})".format(cat.title, len(cat.entities)) for cat in basePuzzle.categories)
+            )
+        self.basePuzzle = basePuzzle.blank()
+        self.basePuzzle.use_solver_cache(cache_entries, cache_bytes)
+        self.basePuzzle.use_nogoods(nogood_entries)
+        self.basePuzzle.use_state_trie(trie_nodes)
+        self.basePuzzle.use_pair_screen(
+            get_compatibility(self.basePuzzle) if pair_screen else None
+        )
+        self.basePuzzle.use_profile(profile)
+        if target_solution:
+            self.hint_pool = GuidedHintPool(self.basePuzzle)
+        else:
+            # a pool of its own, seeded from random here, so
+            # random.seed before making the space repeats a run
+            self.hint_pool = HintPool(self.basePuzzle)
+        # mutations draw from the same pool
+        self.basePuzzle.use_hint_pool(self.hint_pool)
+        self.checker = None
+        self.checked = []
     
     def generate_random_individual(self):
         '''
@@ -34,7 +88,7 @@ class LogicPuzzleSpace (ProblemSpace):
         for initialization 
         '''
         num = random.randint(1, 5)
-        hints = [generate_hint(self.basePuzzle) for i in range(num)]
+        hints = [self.hint_pool.draw() for i in range(num)]
         return HintSet(hints, self.basePuzzle)
 
     def mutate(self, individual, mutation_rate):
@@ -84,6 +138,13 @@ class LogicPuzzleSpace (ProblemSpace):
         These constraints should be ATOMIC rather then general 
         """
         return get_constant_constraints(self.basePuzzle) 
+
+    def check_constant_constraints(self, ind):
+        """
+        Return (feasible, constraints_sat) for the constant
+        constraints, checked together in one pass
+        """
+        return check_constant_constraints(ind)
     
     def get_initial_variable_constraints(self):
      
@@ -91,9 +152,78 @@ class LogicPuzzleSpace (ProblemSpace):
     
     def is_contradictory(self, constraints):
         return is_contradictory(self.basePuzzle, constraints) 
+
+    def screen_constraints(self, constraints, candidates):
+        """
+        Return is_contradictory(constraints + [candidate]) for
+        every candidate, with one ContradictionChecker kept for
+        the last list of constraints asked about
+        """
+        if self.checker is None or len(self.checked) != len(constraints) or any(
+            a is not b for a, b in zip(self.checked, constraints)
+        ):
+            self.checked = constraints[:]
+            self.checker = ContradictionChecker(self.basePuzzle, constraints)
+        return self.checker.screen(candidates)
     
     def get_rand_constraint(self):
-        return random_constraint(self.basePuzzle)
+        return random_constraint(self.basePuzzle, self.hint_pool)
     
     def get_ind_constraint(self, ind):
-        return constraint_in_ind(ind)
\ No newline at end of file
+        return constraint_in_ind(ind)
+
+    def solver_profile(self):
+        """
+        Return the solver timings per rule, None
+        unless the space was made with profile=True
+        """
+        if self.basePuzzle.profile is None:
+            return None
+        report = self.basePuzzle.profile.report()
+        report["cache"] = self.solver_cache_stats()
+        report["nogoods"] = self.nogood_stats()
+        report["state_trie"] = self.state_trie_stats()
+        report["pair_screen"] = self.pair_screen_stats()
+        report["hint_pool"] = self.hint_pool_stats()
+        return report
+
+    def solver_cache_stats(self):
+        """
+        Return the hit and miss counters of the solver cache
+        """
+        if self.basePuzzle.solver_cache is None:
+            return None
+        return self.basePuzzle.solver_cache.stats()
+
+    def nogood_stats(self):
+        """
+        Return the hit and miss counters of the nogood store
+        """
+        if self.basePuzzle.nogoods is None:
+            return None
+        return self.basePuzzle.nogoods.stats()
+
+    def state_trie_stats(self):
+        """
+        Return the hit and miss counters of the state trie
+        """
+        if self.basePuzzle.state_trie is None:
+            return None
+        return self.basePuzzle.state_trie.stats()
+
+    def pair_screen_stats(self):
+        """
+        Return the check and rejection counters of the pair screen
+        """
+        if self.basePuzzle.pair_screen is None:
+            return None
+        return self.basePuzzle.pair_screen.stats()
+
+    def hint_pool_stats(self):
+        """
+        Return the sampled and accepted counters of the
+        hint pool, None unless made with target_solution=True
+        """
+        if not isinstance(self.hint_pool, GuidedHintPool):
+            return None
+        return self.hint_pool.stats()
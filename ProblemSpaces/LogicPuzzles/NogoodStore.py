@@ -0,0 +1,95 @@
+from collections import OrderedDict
+
+from Insights import insight_mask
+
+
+class NogoodStore:
+    """
+    Least recently used store of contradictory hint sets
+
+    A nogood is a frozenset of compiled hints the solver found
+    contradictory, with the forbidden insights it was solved
+    under. Adding hints never makes a contradiction go away, so
+    any hint list holding every hint of a nogood is contradictory
+    too and need not be solved.
+
+    Each nogood is filed under one of its hints (the one the
+    solver failed on), so a lookup only looks at the nogoods
+    filed under the hints of the list.
+
+    max_entries: most nogoods to keep, None for no limit
+    max_size: most hints in a nogood worth keeping
+    """
+
+    def __init__(self, max_entries=10000, max_size=6):
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.watches = {}
+        self.hits = 0
+        self.misses = 0
+        self.added = 0
+        self.evictions = 0
+
+    def add(self, hints, failed, forbidden_insights):
+        """
+        record that the compiled hints are contradictory,
+        failed is the hint the solver failed on
+        """
+        if len(hints) > self.max_size:
+            return
+        nogood = (frozenset(hints), insight_mask(forbidden_insights))
+        if nogood in self.entries:
+            self.entries.move_to_end(nogood)
+            return
+        self.entries[nogood] = failed
+        self.watches.setdefault((failed, nogood[1]), []).append(nogood)
+        self.added += 1
+
+        while self.max_entries is not None and len(self.entries) > self.max_entries:
+            evicted, watch = self.entries.popitem(last=False)
+            nogoods = self.watches[(watch, evicted[1])]
+            nogoods.remove(evicted)
+            if not nogoods:
+                del self.watches[(watch, evicted[1])]
+            self.evictions += 1
+
+    def contains(self, hints, forbidden_insights):
+        """
+        return whether the compiled hints
+        hold every hint of a known nogood
+        """
+        mask = insight_mask(forbidden_insights)
+        hint_set = None
+        for hint in hints:
+            nogoods = self.watches.get((hint, mask))
+            if nogoods is None:
+                continue
+            if hint_set is None:
+                hint_set = frozenset(hints)
+            for nogood in nogoods:
+                if nogood[0] <= hint_set:
+                    self.hits += 1
+                    self.entries.move_to_end(nogood)
+                    return True
+        self.misses += 1
+        return False
+
+    def clear(self):
+        self.entries.clear()
+        self.watches.clear()
+
+    def stats(self):
+        """
+        return the hit, miss, add and eviction
+        counters with the number of nogoods kept
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "added": self.added,
+            "evictions": self.evictions,
+            "entries": len(self.entries),
+        }
@@ -0,0 +1,90 @@
+from collections import OrderedDict
+
+from Insights import insight_mask
+
+
+class SolverCache:
+    """
+    Least recently used cache of apply_hints results
+
+    Keys are fingerprints from solver_key, values are
+    (completed puzzle, valid, loops, insights) with the
+    puzzle frozen and the insights a frozenset, so a
+    result can be handed to every individual that asks
+
+    max_entries: most results to keep, None for no limit
+    max_bytes: most grid bytes to keep, None for no limit
+    """
+
+    def __init__(self, max_entries=10000, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        return the cached result for key, or None
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, result):
+        """
+        freeze and store a result, evicting the least
+        recently used results to stay in budget
+        """
+        puzzle, valid, loops, insights = result
+        puzzle.freeze()
+        result = (puzzle, valid, loops, frozenset(insights))
+        size = puzzle.nbytes() + 8 * len(key[0])
+
+        if key in self.entries:
+            self.bytes -= self.entries.pop(key)[1]
+        self.entries[key] = (result, size)
+        self.bytes += size
+
+        while self.entries and (
+            (self.max_entries is not None and len(self.entries) > self.max_entries)
+            or (self.max_bytes is not None and self.bytes > self.max_bytes)
+        ):
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.bytes -= evicted
+            self.evictions += 1
+        return result
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+    def stats(self):
+        """
+        return the hit, miss and eviction counters
+        with the current size of the cache
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+        }
+
+
+def solver_key(compiled_hints, forbidden_insights):
+    """
+    fingerprint of a solve: the compiled hints in order,
+    since the order decides the loop count, and the
+    forbidden insights
+    """
+    return tuple(compiled_hints), insight_mask(forbidden_insights)
@@ -0,0 +1,78 @@
+from time import perf_counter_ns
+
+import CompiledHints
+
+# names of the rules apply_hint dispatches to, by opcode
+RULE_NAMES = {
+    CompiledHints.IS: "apply_is",
+    CompiledHints.NOT: "apply_not",
+    CompiledHints.BEFORE: "apply_before",
+    CompiledHints.SIMPLE_OR: "apply_simple_or",
+    CompiledHints.COMPOUND_OR: "apply_compound_or",
+    CompiledHints.UNKNOWN: "unknown",
+}
+
+
+class SolverProfile:
+    """
+    Counts and nanosecond timings of the solver, summed
+    over every apply_hints call made with it
+
+    per rule (apply_is, ..., find_openings, find_transitives):
+    calls, how many calls changed the puzzle, and the time spent
+    """
+
+    clock = staticmethod(perf_counter_ns)
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.solves = 0
+        self.loops = 0
+        self.solve_ns = 0
+        self.calls = {}
+        self.applied = {}
+        self.ns = {}
+        self.insights = {}
+
+    def add(self, rule, applied, ns):
+        """
+        record one call of a rule
+        """
+        self.calls[rule] = self.calls.get(rule, 0) + 1
+        self.applied[rule] = self.applied.get(rule, 0) + bool(applied)
+        self.ns[rule] = self.ns.get(rule, 0) + ns
+
+    def add_solve(self, loops, insights, ns):
+        """
+        record one apply_hints call
+        """
+        self.solves += 1
+        self.loops += loops
+        self.solve_ns += ns
+        for insight in insights:
+            self.insights[insight] = self.insights.get(insight, 0) + 1
+
+    def report(self):
+        """
+        return the totals as a dictionary,
+        rules with the most time first
+        """
+        rules = {}
+        for rule in sorted(self.ns, key=self.ns.get, reverse=True):
+            rules[rule] = {
+                "calls": self.calls[rule],
+                "applied": self.applied[rule],
+                "ns": self.ns[rule],
+                "mean_ns": self.ns[rule] // self.calls[rule],
+            }
+        return {
+            "solves": self.solves,
+            "loops": self.loops,
+            "solve_ns": self.solve_ns,
+            "rules": rules,
+            "insights": {
+                insight.name: count for insight, count in self.insights.items()
+            },
+        }
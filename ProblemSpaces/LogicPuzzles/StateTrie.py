@@ -0,0 +1,122 @@
+from collections import OrderedDict
+
+from Insights import insight_mask
+
+
+class TrieNode:
+    __slots__ = ("parent", "hint", "state", "children")
+
+    def __init__(self, parent, hint, state):
+        self.parent = parent
+        self.hint = hint
+        self.state = state
+        self.children = {}
+
+
+class StateTrie:
+    """
+    Trie of solver states shared by every solve of a puzzle
+
+    The path to a node spells a sequence of compiled hints and
+    the node keeps the SolverState of the first pass after them,
+    so a solve resumes after the longest prefix of its hints
+    anyone solved before. There is one trie per set of forbidden
+    insights, rooted at the blank state.
+
+    Only first pass states are kept: the later passes go over
+    the backlog of every hint, so they always run in full, and a
+    resumed solve matches a solve from scratch.
+
+    max_nodes: most nodes to keep, the least recently used
+    are dropped with their subtrees
+    """
+
+    def __init__(self, max_nodes=20000):
+        self.max_nodes = max_nodes
+        self.roots = {}
+        self.nodes = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.resumed = 0
+        self.evictions = 0
+
+    def path(self, puzzle, hints, forbidden_insights):
+        """
+        return the nodes for the longest prefix of the
+        compiled hints in the trie, from the root down
+        """
+        mask = insight_mask(forbidden_insights)
+        root = self.roots.get(mask)
+        if root is None:
+            root = TrieNode(None, None, puzzle.blank_state())
+            self.roots[mask] = root
+
+        path = [root]
+        node = root
+        for hint in hints:
+            node = node.children.get(hint)
+            if node is None:
+                break
+            path.append(node)
+
+        if len(path) > 1:
+            self.hits += 1
+            self.resumed += len(path) - 1
+        else:
+            self.misses += 1
+        # deepest first, so a node is never older than its children
+        for node in reversed(path[1:]):
+            self.nodes.move_to_end(node)
+        return path
+
+    def child(self, node, hint, state):
+        """
+        add the state after node's hints and hint,
+        return the new node
+        """
+        if node.parent is None and node.hint is not None:
+            # node was evicted while the solve went on
+            return node
+        child = node.children.get(hint)
+        if child is not None:
+            return child
+        child = TrieNode(node, hint, state)
+        node.children[hint] = child
+        self.nodes[child] = None
+        while self.max_nodes is not None and len(self.nodes) > self.max_nodes:
+            evicted, _ = self.nodes.popitem(last=False)
+            self._drop(evicted)
+        return child
+
+    def _drop(self, node):
+        """
+        remove node and its subtree
+        """
+        del node.parent.children[node.hint]
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            node.parent = None
+            self.nodes.pop(node, None)
+            self.evictions += 1
+            stack.extend(node.children.values())
+            node.children = {}
+
+    def clear(self):
+        self.roots.clear()
+        self.nodes.clear()
+
+    def stats(self):
+        """
+        return the hit, miss and eviction counters, the
+        hints skipped by resuming and the number of nodes
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "resumed_hints": self.resumed,
+            "evictions": self.evictions,
+            "nodes": len(self.nodes),
+        }
@@ -0,0 +1,108 @@
+class TransitiveIndex:
+    """
+    Union-find over every entity in a puzzle
+
+    Entities joined by an "O" share a class. Each class keeps
+    a bitmask of the entities any of its members has an "X"
+    with, and each entity keeps its own "X" bitmask.
+
+    Entity ids are the ids of the puzzle's Lookup
+    """
+
+    def __init__(self, puzzle):
+        lookup = puzzle.lookup
+        self.categories = puzzle.categories
+        self.entity_ids = lookup.entity_ids
+        self.entities = lookup.entities
+        self.category_of = lookup.category_of
+        self.category_masks = [0] * len(self.categories)
+        for i, c in enumerate(self.category_of):
+            self.category_masks[c] |= 1 << i
+
+        size = len(self.entities)
+        self.parent = list(range(size))
+        self.members = [[i] for i in range(size)]
+        self.crossed = [0] * size
+        self.excluded = [0] * size
+
+        # read in what is already answered
+        for i, cat1 in enumerate(self.categories):
+            for cat2 in self.categories[i + 1 :]:
+                for ent1 in cat1.entities:
+                    for ent2 in cat2.entities:
+                        symbol = puzzle.get_symbol(cat1, cat2, ent1, ent2)
+                        if symbol != "*":
+                            self.answered(cat1, cat2, ent1, ent2, symbol)
+
+    def find(self, i):
+        root = i
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[i] != root:
+            self.parent[i], i = root, self.parent[i]
+        return root
+
+    def union(self, i, j):
+        i = self.find(i)
+        j = self.find(j)
+        if i == j:
+            return
+        if len(self.members[i]) < len(self.members[j]):
+            i, j = j, i
+        self.parent[j] = i
+        self.members[i] += self.members[j]
+        self.excluded[i] |= self.excluded[j]
+        self.members[j] = None
+
+    def cross(self, i, j):
+        self.crossed[i] |= 1 << j
+        self.crossed[j] |= 1 << i
+        self.excluded[self.find(i)] |= 1 << j
+        self.excluded[self.find(j)] |= 1 << i
+
+    def answered(self, cat1, cat2, ent1, ent2, symbol):
+        """
+        record a new symbol between two entities
+        """
+        self.answered_at(self.entity_ids[cat1][ent1], self.entity_ids[cat2][ent2], symbol)
+
+    def answered_at(self, i, j, symbol):
+        """
+        record a new symbol between entity ids i and j
+        """
+        if symbol == "O":
+            self.union(i, j)
+        elif symbol == "X":
+            self.cross(i, j)
+
+    def classes(self):
+        """
+        return (members, excluded mask) for every
+        class with more than one entity
+
+        members are sorted and classes ordered by their first
+        member, so the order depends only on the grids and not
+        on the order the answers came in
+        """
+        return sorted(
+            (sorted(members), self.excluded[root])
+            for root, members in enumerate(self.members)
+            if members is not None and len(members) > 1
+        )
+
+    def possible(self, i, category):
+        """
+        bitmask of entities in category that
+        entity i is not crossed out with
+        """
+        return self.category_masks[category] & ~self.crossed[i]
+
+
+def bits(mask):
+    """
+    yield the index of every set bit, lowest first
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
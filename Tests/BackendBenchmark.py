@@ -0,0 +1,44 @@
+import sys
+import os
+import random
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(str(Path.cwd().parent) + "/ProblemSpaces/LogicPuzzles")
+from ProblemSpaces.LogicPuzzles.LogicPuzzle import Puzzle, Category
+from ProblemSpaces.LogicPuzzles.TensorPuzzle import TensorPuzzle
+from ProblemSpaces.LogicPuzzles.HintGrammar import get_sampler
+
+# Seconds to solve the same hint lists from scratch with the list
+# backend (Puzzle) and the int8 numpy backend (TensorPuzzle), no
+# solver cache, for puzzles of 3 to 6 categories of 4 to 6 entities
+
+
+def make_categories(num_cats, num_ents):
+    categories = [Category("c0", [str(i + 1) for i in range(num_ents)], True)]
+    for c in range(1, num_cats):
+        categories.append(Category("c%d" % c, ["e%d_%d" % (c, i) for i in range(num_ents)], c == num_cats - 1))
+    return categories
+
+
+def seconds(backend, categories, hint_lists):
+    start = time.perf_counter()
+    for hints in hint_lists:
+        backend(categories).apply_hints(hints)
+    return time.perf_counter() - start
+
+
+random.seed(0)
+rng = np.random.default_rng(0)
+print("shape    Puzzle  TensorPuzzle  ratio")
+for num_cats, num_ents in [(3, 4), (4, 4), (4, 5), (5, 5), (6, 6)]:
+    categories = make_categories(num_cats, num_ents)
+    sampler = get_sampler(Puzzle(categories))
+    hint_lists = [sampler.sample_many(rng, random.randint(1, 10)) for _ in range(300)]
+    lists_time = seconds(Puzzle, categories, hint_lists)
+    tensor_time = seconds(TensorPuzzle, categories, hint_lists)
+    print("{}x{}   {:7.2f}s  {:11.2f}s  {:5.2f}".format(
+        num_cats, num_ents, lists_time, tensor_time, tensor_time / lists_time))
@@ -0,0 +1,56 @@
+import sys
+import os
+import random
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(str(Path.cwd().parent) + "/ProblemSpaces/LogicPuzzles")
+from Algorithms.Shuffling import Shuffling
+from Personas.TwoForwardOneBack import TwoForOneBackUser
+from ProblemSpaces.LogicPuzzles.LogicPuzzleSpace import LogicPuzzleSpace, order, method, ingredient
+from ProblemSpaces.LogicPuzzles.LogicPuzzle import Puzzle
+
+# Share of feasible individuals among everything the algorithm
+# evaluates, and evaluations per second, with hints from the
+# grammar and with only hints true in a hidden target solution
+# (target_solution=True)
+
+
+def run(target_solution, seed):
+    random.seed(seed)
+    np.random.seed(seed)
+    # a puzzle of its own, so the runs share no solver caches
+    problem_space = LogicPuzzleSpace(
+        Puzzle([order, method, ingredient]), target_solution=target_solution
+    )
+    evaluations = [0, 0]
+    check = problem_space.check_constant_constraints
+
+    def counted(ind):
+        feasible, constraints_sat = check(ind)
+        evaluations[0] += 1
+        evaluations[1] += feasible
+        return feasible, constraints_sat
+
+    problem_space.check_constant_constraints = counted
+    algorithm = Shuffling(problem_space, number_generations=100, population_size=50, max_memory=300, cross_over_rate=0.7, mutation_rate=0.5, user=TwoForOneBackUser(problem_space), update_interval=10)
+    start = time.time()
+    algorithm.run()
+    seconds = time.time() - start
+    return evaluations[1] / evaluations[0], evaluations[0] / seconds, problem_space.hint_pool_stats()
+
+
+for target_solution in [False, True]:
+    rates, speeds = [], []
+    for seed in range(2, 6):
+        rate, speed, stats = run(target_solution, seed)
+        rates.append(rate)
+        speeds.append(speed)
+    print("target_solution={}".format(target_solution))
+    print("  feasible evaluations: {:.1%}".format(sum(rates) / len(rates)))
+    print("  evaluations per second: {:.0f}".format(sum(speeds) / len(speeds)))
+    if stats is not None:
+        print("  hints accepted: {:.1%}".format(stats["accept_rate"]))
@@ -0,0 +1,77 @@
+import sys
+import os
+import gc
+import random
+import tracemalloc
+from pathlib import Path
+
+sys.path.append(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(str(Path.cwd().parent) + "/ProblemSpaces/LogicPuzzles")
+from ProblemSpaces.LogicPuzzles.LogicPuzzleSpace import LogicPuzzleSpace
+
+# Bytes per individual for offspring like the algorithms make them
+# (cross over, then mutate), solved, checked against the constant
+# constraints and kept as in an archive.
+#
+# "before" is the HintSet of the baseline, an object holding a list
+# of grammar hints, the completed Puzzle, valid, loops and the set
+# of solver insights. Its hint dicts were shared between parents
+# and children, as the decoded hints of a HintUniverse are, so
+# only the list is counted for them
+
+
+def make_offspring(problem_space, parents, n):
+    children = []
+    while len(children) < n:
+        ind1, ind2 = random.sample(parents, 2)
+        child1, child2 = problem_space.cross_over(ind1, ind2)
+        children.append(problem_space.mutate(child1, 0.5))
+        children.append(problem_space.mutate(child2, 0.5))
+    for child in children:
+        problem_space.check_constant_constraints(child)
+    return children
+
+
+class BaselineHintSet:
+    def __init__(self, ind):
+        self.hints = list(ind.hints)
+        self.puzzle = ind.puzzle
+        self.completed_puzzle = ind.completed_puzzle
+        self.valid = ind.valid
+        self.loops = ind.loops
+        self.solver_insights = ind.solver_insights
+
+
+def baseline_objects(individuals):
+    return [BaselineHintSet(ind) for ind in individuals]
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    return size, kept
+
+
+random.seed(0)
+number = 1000
+# no solver cache, so every individual holds its own result
+problem_space = LogicPuzzleSpace(cache_entries=0)
+parents = [problem_space.generate_random_individual() for i in range(50)]
+make_offspring(problem_space, parents, 200)
+
+after, individuals = measure(lambda: make_offspring(problem_space, parents, number))
+# decode every hint once, so the shared dicts are not counted
+for ind in individuals:
+    ind.hints
+before, objects = measure(lambda: baseline_objects(individuals))
+
+print("individuals: {}".format(len(individuals)))
+print("checkpoints per individual: {:.2f}".format(
+    sum(len(ind.checkpoints) for ind in individuals) / len(individuals)))
+print("bytes per individual before: {:.0f}".format(before / len(individuals)))
+print("bytes per individual after: {:.0f}".format(after / len(individuals)))
@@ -0,0 +1,153 @@
+import sys
+import os
+import json
+import random
+import subprocess
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "ProblemSpaces", "LogicPuzzles"))
+from LogicPuzzle import Puzzle, Category
+from HintGrammar import get_sampler
+from CompiledHints import compile_hint
+from GuidedHints import random_solution, hints_hold
+from Insights import Insight
+
+# Writes solver_baseline.json for test_solver.py: seeded random
+# hint lists and what the solver of the baseline commit (before
+# the solver was reworked) makes of them, run in a subprocess on
+# its LogicPuzzle.py and Insights.py from git.
+#
+# Rerun it only to add cases, the results must stay the
+# baseline's: python Tests/make_solver_baseline.py
+
+BASELINE = "1f1aa6a"
+SHAPES = [(3, 4), (4, 4), (4, 5)]
+CASES_PER_SHAPE = 60
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+SOLVE = """
+import sys, json
+from LogicPuzzle import Puzzle, Category
+from Insights import Insight
+
+def decode(value, cats):
+    if isinstance(value, dict):
+        if "category" in value:
+            return cats[value["category"]]
+        return {rule: decode(terms, cats) for rule, terms in value.items()}
+    if isinstance(value, list):
+        return [decode(term, cats) for term in value]
+    return value
+
+results = []
+for case in json.load(sys.stdin):
+    cats = [Category(*cat) for cat in case["categories"]]
+    hints = [decode(hint, cats) for hint in case["hints"]]
+    forbidden = {Insight[name] for name in case["forbidden"]}
+    puzzle, valid, loops, insights = Puzzle(cats).apply_hints(hints, forbidden)
+    symbols = ""
+    for i, cat1 in enumerate(cats):
+        for cat2 in cats[i + 1:]:
+            for ent1 in cat1.entities:
+                for ent2 in cat2.entities:
+                    symbols += puzzle.get_symbol(cat1, cat2, ent1, ent2)
+    results.append({"valid": valid, "loops": loops, "symbols": symbols,
+                    "insights": sorted(insight.name for insight in insights)})
+json.dump(results, sys.stdout)
+"""
+
+
+def make_categories(num_cats, num_ents):
+    """
+    categories like the experiments', the first is
+    the numeric row order, and so is the last when
+    there are more than three
+    """
+    categories = [("c0", [str(i + 1) for i in range(num_ents)], True)]
+    for c in range(1, num_cats):
+        numeric = c == num_cats - 1 and num_cats > 3
+        categories.append(("c%d" % c, ["e%d_%d" % (c, i) for i in range(num_ents)], numeric))
+    return categories
+
+
+def encode(value, cats):
+    if isinstance(value, Category):
+        return {"category": cats.index(value)}
+    if isinstance(value, dict):
+        return {rule: encode(terms, cats) for rule, terms in value.items()}
+    if isinstance(value, list):
+        return [encode(term, cats) for term in value]
+    return value
+
+
+def sample_hints(puzzle, rng, n, target):
+    """
+    n hints from the grammar, only ones true
+    in target unless it is None
+    """
+    sampler = get_sampler(puzzle)
+    hints = []
+    while len(hints) < n:
+        batch = sampler.sample_many(rng, 64)
+        if target is not None:
+            keep = hints_hold(target, [compile_hint(puzzle, hint) for hint in batch])
+            batch = [hint for hint, true in zip(batch, keep) if true]
+        hints += batch
+    return hints[:n]
+
+
+def make_cases(seed=0):
+    random.seed(seed)
+    rng = np.random.default_rng(seed)
+    cases = []
+    for num_cats, num_ents in SHAPES:
+        categories = make_categories(num_cats, num_ents)
+        cats = [Category(*cat) for cat in categories]
+        puzzle = Puzzle(cats)
+        for _ in range(CASES_PER_SHAPE):
+            mode = random.random()
+            if mode < 0.35:
+                # the grammar's own hints, mostly contradictory
+                hints = sample_hints(puzzle, rng, random.randint(1, 12), None)
+            else:
+                hints = sample_hints(puzzle, rng, random.randint(3, 25), random_solution(puzzle, rng))
+                if mode > 0.8:
+                    # a few free hints in a consistent list
+                    hints += sample_hints(puzzle, rng, random.randint(1, 3), None)
+                    random.shuffle(hints)
+            forbidden = []
+            if random.random() < 0.25:
+                forbidden = sorted(insight.name for insight in random.sample(list(Insight), random.randint(1, 5)))
+            cases.append({
+                "categories": categories,
+                "hints": [encode(hint, cats) for hint in hints],
+                "forbidden": forbidden,
+            })
+    return cases
+
+
+def solve_on_baseline(cases):
+    with tempfile.TemporaryDirectory() as folder:
+        for name in ["LogicPuzzle.py", "Insights.py"]:
+            source = subprocess.run(
+                ["git", "show", "{}:ProblemSpaces/LogicPuzzles/{}".format(BASELINE, name)],
+                cwd=HERE, check=True, capture_output=True, text=True,
+            ).stdout
+            with open(os.path.join(folder, name), "w") as f:
+                f.write(source)
+        solved = subprocess.run(
+            [sys.executable, "-c", SOLVE], cwd=folder, check=True,
+            input=json.dumps(cases), capture_output=True, text=True,
+        ).stdout
+    return json.loads(solved)
+
+
+if __name__ == "__main__":
+    cases = make_cases()
+    for case, result in zip(cases, solve_on_baseline(cases)):
+        case.update(result)
+    with open(os.path.join(HERE, "solver_baseline.json"), "w") as f:
+        json.dump({"baseline": BASELINE, "cases": cases}, f, separators=(",", ":"))
+    print("{} cases, {} valid".format(len(cases), sum(case["valid"] for case in cases)))
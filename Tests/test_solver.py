@@ -0,0 +1,166 @@
+import sys
+import os
+import json
+import random
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "ProblemSpaces", "LogicPuzzles"))
+from LogicPuzzle import Puzzle, Category
+from TensorPuzzle import TensorPuzzle
+from Insights import Insight
+from HintGrammar import get_sampler
+from CompiledHints import compile_hints
+from HintCompatibility import get_compatibility
+from LogicPuzzleSpace import LogicPuzzleSpace
+
+# The solver against solver_baseline.json, the results of the
+# solver of the baseline commit (see make_solver_baseline.py),
+# on both backends, from scratch and through the fast paths
+
+with open(os.path.join(os.path.dirname(__file__), "solver_baseline.json")) as f:
+    CASES = json.load(f)["cases"]
+
+BACKENDS = [Puzzle, TensorPuzzle]
+
+
+def decode(value, cats):
+    if isinstance(value, dict):
+        if "category" in value:
+            return cats[value["category"]]
+        return {rule: decode(terms, cats) for rule, terms in value.items()}
+    if isinstance(value, list):
+        return [decode(term, cats) for term in value]
+    return value
+
+
+_categories = {}
+
+def load(case):
+    """
+    return the categories, hints and forbidden insights of
+    a case, cases of one shape share their Category objects
+    """
+    key = json.dumps(case["categories"])
+    if key not in _categories:
+        _categories[key] = [Category(*cat) for cat in case["categories"]]
+    cats = _categories[key]
+    hints = [decode(hint, cats) for hint in case["hints"]]
+    forbidden = {Insight[name] for name in case["forbidden"]}
+    return cats, hints, forbidden
+
+
+def symbols(puzzle, cats):
+    out = ""
+    for i, cat1 in enumerate(cats):
+        for cat2 in cats[i + 1:]:
+            for ent1 in cat1.entities:
+                for ent2 in cat2.entities:
+                    out += puzzle.get_symbol(cat1, cat2, ent1, ent2)
+    return out
+
+
+def check(result, case, cats):
+    puzzle, valid, loops, insights = result
+    assert valid == case["valid"]
+    assert loops == case["loops"]
+    assert sorted(insight.name for insight in insights) == case["insights"]
+    assert symbols(puzzle, cats) == case["symbols"]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_matches_baseline(backend):
+    for case in CASES:
+        cats, hints, forbidden = load(case)
+        check(backend(cats).apply_hints(hints, forbidden), case, cats)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_cache_and_trie_match_baseline(backend):
+    puzzles = {}
+    for case in CASES:
+        cats, hints, forbidden = load(case)
+        key = tuple(cats)
+        if key not in puzzles:
+            puzzles[key] = backend(cats)
+            puzzles[key].use_solver_cache()
+            puzzles[key].use_state_trie()
+        puzzle = puzzles[key]
+        # the prefix leaves a path in the trie for the first
+        # full solve to resume from, the second is a cache hit
+        puzzle.apply_hints(hints[: len(hints) // 2], forbidden)
+        check(puzzle.apply_hints(hints, forbidden), case, cats)
+        check(puzzle.apply_hints(hints, forbidden), case, cats)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_checkpoint_resume_matches_baseline(backend):
+    for case in CASES:
+        cats, hints, forbidden = load(case)
+        puzzle = backend(cats)
+        checkpoints = []
+        puzzle.apply_hints(hints[: len(hints) // 2 + 1], forbidden, checkpoints)
+        check(puzzle.apply_hints(hints, forbidden, checkpoints), case, cats)
+
+
+def rejected_lists(puzzle, n):
+    """
+    solve n seeded lists drawn from a small pool of grammar
+    hints on puzzle, so they share hints, and return those
+    rejected without a solve
+    """
+    random.seed(0)
+    pool = get_sampler(puzzle).sample_many(np.random.default_rng(0), 40)
+    rejected = []
+    for _ in range(n):
+        hints = random.sample(pool, random.randint(2, 8))
+        if puzzle.rejected(compile_hints(puzzle, hints)) is not None:
+            rejected.append(hints)
+        puzzle.apply_hints(hints)
+    return rejected
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_screened_lists_are_contradictory(backend):
+    puzzle = backend(load(CASES[-1])[0])
+    puzzle.use_pair_screen(get_compatibility(puzzle))
+    rejected = rejected_lists(puzzle, 300)
+    assert rejected
+    for hints in rejected:
+        assert not puzzle.pair_screen.compatible(compile_hints(puzzle, hints))
+        assert not backend(puzzle.categories).apply_hints(hints)[1]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_nogood_lists_are_contradictory(backend):
+    puzzle = backend(load(CASES[-1])[0])
+    puzzle.use_nogoods()
+    rejected = rejected_lists(puzzle, 300)
+    assert rejected
+    for hints in rejected:
+        assert not backend(puzzle.categories).apply_hints(hints)[1]
+
+
+def test_screen_constraints_matches_is_contradictory():
+    random.seed(0)
+    space = LogicPuzzleSpace()
+    # constraints true in one solution, so lists are not all contradictory
+    guided = LogicPuzzleSpace(target_solution=True)
+    results = []
+    for _ in range(30):
+        constraints = [guided.get_rand_constraint() for _ in range(random.randint(0, 8))]
+        if random.random() < 0.3:
+            constraints.append(space.get_rand_constraint())
+        candidates = [guided.get_rand_constraint() for _ in range(6)]
+        candidates += [space.get_rand_constraint() for _ in range(6)]
+        # the list changed in place, the kept checker must not be used
+        for change in range(3):
+            expected = [space.is_contradictory(constraints + [con]) for con in candidates]
+            assert space.screen_constraints(constraints, candidates) == expected
+            results += expected
+            if change == 0:
+                constraints.append(guided.get_rand_constraint())
+            elif change == 1 and constraints:
+                constraints[random.randrange(len(constraints))] = space.get_rand_constraint()
+    assert any(results) and not all(results)
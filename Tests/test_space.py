@@ -0,0 +1,174 @@
+import sys
+import os
+import random
+import pickle
+import copy
+import gc
+import weakref
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "ProblemSpaces", "LogicPuzzles"))
+from LogicPuzzle import Puzzle, Category
+from TensorPuzzle import TensorPuzzle
+from LogicPuzzleSpace import LogicPuzzleSpace, order, method, ingredient
+from Algorithms.Shuffling import Shuffling
+from Personas.TwoForwardOneBack import TwoForOneBackUser
+from GeneticAlgorithmInterface import SatisfactionMatrix
+
+# LogicPuzzleSpace and its individuals as the algorithms and
+# Tests/RunExperiments.py use them
+
+BACKENDS = [Puzzle, TensorPuzzle]
+
+
+def solved_population(space, n):
+    population = [space.generate_random_individual() for _ in range(n)]
+    for ind in population:
+        ind.solve()
+    return population
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_pickled_population_leaves_out_solver_state(backend):
+    random.seed(0)
+    space = LogicPuzzleSpace(backend([order, method, ingredient]), nogood_entries=1000, trie_nodes=20000)
+    population = solved_population(space, 50)
+    # fill the solver cache, nogoods and trie with other individuals
+    for _ in range(2000):
+        space.mutate(random.choice(population), 0.5).solve()
+    assert space.solver_cache_stats()["entries"] > 1000
+
+    pickled = pickle.dumps(population)
+    assert len(pickled) < 100000
+    # nor do the decoded hints of the shared HintUniverse
+    for _ in range(1000):
+        space.mutate(random.choice(population), 0.5).solve()
+    assert len(pickle.dumps(population)) == len(pickled)
+    loaded = pickle.loads(pickled)
+    for before, after in zip(population, loaded):
+        assert after.puzzle.solver_cache is None
+        assert after.puzzle.state_trie is None
+        assert after.puzzle.nogoods is None
+        assert after.checkpoints == []
+        assert (after.valid, after.loops) == (before.valid, before.loops)
+        assert after.completed_puzzle.pack() == before.completed_puzzle.pack()
+
+
+def test_spaces_share_no_solver_state():
+    random.seed(0)
+    # categories of their own, so the first space makes their HintUniverse
+    categories = [Category(cat.title, cat.entities, cat.is_numeric) for cat in [order, method, ingredient]]
+    first = LogicPuzzleSpace(Puzzle(categories), trie_nodes=20000)
+    population = solved_population(first, 20)
+    base = weakref.ref(first.basePuzzle)
+    # a later space over the same categories, with every option off
+    second = LogicPuzzleSpace(Puzzle(categories), cache_entries=0, trie_nodes=0)
+    ind = second.generate_random_individual()
+    ind.solve()
+    assert ind.puzzle is second.basePuzzle
+    assert second.solver_cache_stats() is None
+    assert second.state_trie_stats() is None
+    del first, population
+    gc.collect()
+    assert base() is None
+
+
+def test_target_solution_needs_equal_categories():
+    short = Category("short", ["a", "b", "c"], False)
+    with pytest.raises(ValueError, match="short \\(3\\)"):
+        LogicPuzzleSpace(Puzzle([order, method, short]), target_solution=True)
+    # the rest of the space takes them
+    space = LogicPuzzleSpace(Puzzle([order, method, short]))
+    space.generate_random_individual().solve()
+
+
+def run_shuffling(seed):
+    random.seed(seed)
+    np.random.seed(seed)
+    space = LogicPuzzleSpace()
+    algorithm = Shuffling(space, number_generations=6, population_size=20, max_memory=100, cross_over_rate=0.7, mutation_rate=0.5, user=TwoForOneBackUser(space), update_interval=3)
+    algorithm.run()
+    return plain([algorithm.bins, algorithm.infeasible_pop, algorithm.measure_history.populations])
+
+
+def plain(value):
+    """
+    the populations with individuals as their hint IDs
+    """
+    if isinstance(value, (list, tuple)):
+        return [plain(item) for item in value]
+    if hasattr(value, "ids"):
+        return value.ids.tolist()
+    return value
+
+
+def test_seeded_runs_repeat_in_one_process():
+    first = run_shuffling(3)
+    # draws in between must not change the next run
+    random.random()
+    LogicPuzzleSpace().generate_random_individual()
+    assert run_shuffling(3) == first
+    assert run_shuffling(4) != first
+
+
+def check_matrix(matrix, space, constraints, individuals):
+    """
+    the rows of the matrix are those of the individuals
+    and agree with applying every constraint to them
+    """
+    assert set(matrix.rows) == {id(ind) for ind in individuals}
+    for ind in individuals:
+        satisfied = sum(con.apply(ind) for con in constraints)
+        constant = space.check_constant_constraints(ind)
+        assert matrix.rows[id(ind)][0] is ind
+        assert matrix.num_satisfied(ind) == satisfied
+        assert matrix.num_violated(ind) == len(constraints) - satisfied
+        assert matrix.check_constant_constraints(ind) == constant
+        assert matrix.satisfies_all(ind) == (constant[0] and satisfied == len(constraints))
+
+
+class CheckedShuffling(Shuffling):
+    def run_one_generation(self, made_change):
+        result = super().run_one_generation(made_change)
+        kept = [c[1] for c in self.infeasible_pop] + [el[1] for li in self.bins for el in li]
+        check_matrix(self.satisfaction, self.problem_space, self.variable_constraints, kept)
+        self.checked += 1
+        return result
+
+
+def test_satisfaction_matrix_follows_a_run():
+    random.seed(1)
+    np.random.seed(1)
+    space = LogicPuzzleSpace()
+    algorithm = CheckedShuffling(space, number_generations=12, population_size=20, max_memory=60, cross_over_rate=0.7, mutation_rate=0.5, user=TwoForOneBackUser(space), update_interval=2)
+    algorithm.checked = 0
+    algorithm.run()
+    assert algorithm.checked == 12
+    assert algorithm.variable_constraints
+
+
+def test_satisfaction_matrix_replaced_individuals():
+    random.seed(2)
+    space = LogicPuzzleSpace()
+    matrix = SatisfactionMatrix(space)
+    constraints = [space.get_rand_constraint() for _ in range(4)]
+    matrix.set_constraints(constraints)
+    for generation in range(5):
+        individuals = solved_population(space, 30)
+        check_matrix(matrix, space, constraints, [])
+        for ind in individuals:
+            matrix.row(ind)
+        check_matrix(matrix, space, constraints, individuals)
+        # constraints rebuilt as new objects, and half of them new
+        constraints = [copy.copy(con) for con in constraints[2:]] + [space.get_rand_constraint() for _ in range(2)]
+        matrix.set_constraints(constraints)
+        check_matrix(matrix, space, constraints, individuals)
+        matrix.retain(individuals[:10])
+        check_matrix(matrix, space, constraints, individuals[:10])
+        # the next generation may reuse the ids of these
+        matrix.retain([])
+        del individuals
+        gc.collect()